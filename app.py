@@ -1,31 +1,121 @@
 from flask import Flask, render_template, request, jsonify
 from flask_sqlalchemy import SQLAlchemy
+from backend.serializers import FastJSONProvider
+from backend.sqlite_profile import (
+    ReadRoutingSession, apply_sqlite_profile, read_only_url, READONLY_BIND
+)
+from backend.templating import configure_bytecode_cache
+from backend.assets import asset_url
+from backend.metrics import init_metrics
+from backend.slow_queries import init_slow_query_log
 import os
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)  # orjson when installed, stdlib json otherwise
 
 # Database configuration
 basedir = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'techfinder.db')
+# TECHFINDER_DB points the app at another database file (e.g. a benchmark dataset)
+database_path = os.environ.get('TECHFINDER_DB') or os.path.join(basedir, 'techfinder.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + database_path
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+# SQLite engine profile (see backend/sqlite_profile.py)
+app.config['SQLITE_PRAGMAS'] = {}  # Overrides for DEFAULT_PRAGMAS (WAL, busy_timeout, mmap, ...)
+app.config['SQLITE_READONLY_FOR_GET'] = False  # Serve GET/HEAD SELECTs from a mode=ro pool
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': 10,  # Connections kept open per process
+    'max_overflow': 10,  # Extra connections allowed under bursts
+    'pool_timeout': 10,  # Seconds to wait for a free connection
+}
+
+if app.config['SQLITE_READONLY_FOR_GET']:
+    app.config['SQLALCHEMY_BINDS'] = {
+        READONLY_BIND: {
+            'url': read_only_url(database_path),
+            **app.config['SQLALCHEMY_ENGINE_OPTIONS']
+        }
+    }
 app.config['SECRET_KEY'] = 'dev-secret-key-change-in-production'
 
+# Catalog read cache (see backend/cache.py)
+app.config['CATALOG_CACHE_SIZE'] = 1024  # Max cached products/pages/queries
+app.config['CATALOG_CACHE_TTL'] = 300  # Seconds; bounds staleness from other processes
+app.config['PAGE_CACHE_ENABLED'] = True  # Serve rendered catalog pages from memory
+app.config['PAGE_CACHE_SIZE'] = 256  # Max cached pages (each stores identity/gzip/brotli bodies)
+app.config['PAGE_CACHE_TTL'] = 300  # Seconds
+
+# Template rendering (see backend/templating.py)
+app.config['TEMPLATE_STREAMING'] = True  # Stream catalog/wishlist pages instead of building them in memory
+app.config['TEMPLATE_STREAM_CHUNK_SIZE'] = 8192  # Characters per flushed chunk
+app.config['TEMPLATE_BYTECODE_CACHE_DIR'] = os.path.join(basedir, 'instance', 'jinja_cache')  # None disables
+configure_bytecode_cache(app)
+
+# Static assets (see backend/assets.py); build with scripts/build_assets.py
+app.config['ASSET_BUILD_DIR'] = os.path.join(basedir, 'static', 'dist')
+app.add_template_global(asset_url)
+
+# Password hashing (see backend/passwords.py)
+app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000000'  # Changing the cost rehashes on next login
+app.config['PASSWORD_HASH_WORKERS'] = min(4, os.cpu_count() or 1)  # Hashing processes; 0 = hash inline
+app.config['PASSWORD_HASH_MAX_PENDING'] = 32  # Queued hashes before logins get a 503
+app.config['PASSWORD_HASH_TIMEOUT'] = 10  # Seconds to wait for a hash before giving up
+
+# Request metrics (see backend/metrics.py), served at /metrics
+app.config['METRICS_ENABLED'] = True  # Per-route latency, response size and SQL counters
+
+# Slow-query log (see backend/slow_queries.py); report in scripts/db_admin.py
+app.config['SLOW_QUERY_THRESHOLD_MS'] = 100  # Log statements slower than this; 0 disables
+app.config['SLOW_QUERY_LOG_PATH'] = os.path.join(basedir, 'instance', 'slow_queries.jsonl')
+app.config['SLOW_QUERY_LOG_MAX_BYTES'] = 10 * 1024 * 1024  # Then rotated to <path>.1
+app.config['SLOW_QUERY_LOG_PARAMS'] = False  # Log bound values, not just their types (includes password hashes, emails)
+
 # Session security configuration
 app.config['SESSION_COOKIE_HTTPONLY'] = True  # Prevent JavaScript access to session cookie
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'  # CSRF protection
 # app.config['SESSION_COOKIE_SECURE'] = True  # Uncomment in production (requires HTTPS)
 
 # Initialize database
-db = SQLAlchemy(app)
+# Sessions live for one request (see backend/db_utils.py); objects stay
+# usable after commit without a reload
+db = SQLAlchemy(app, session_options={'class_': ReadRoutingSession, 'expire_on_commit': False})
+apply_sqlite_profile(app, db)
+init_metrics(app, db)
+init_slow_query_log(app, db)
 
 @app.route("/")
 def home():
-    from backend.db_utils import get_all_products
-
-    # Fetch all products from database
-    products = get_all_products()
-
-    return render_template("index.html", products=products)
+    from backend.db_utils import get_products_page, iter_products_page, get_catalog_validator
+    from backend.page_cache import cached_page
+    from backend.templating import stream_chunks
+    from flask import redirect, url_for
+
+    cursor = request.args.get('cursor')
+    # Only the columns the cards render
+    fields = ['name', 'description', 'price', 'image_url', 'external_link']
+
+    def render():
+        products, next_cursor = get_products_page(cursor=cursor, fields=fields)
+        return render_template("index.html", products=products, next_cursor=next_cursor)
+
+    def stream():
+        # Header and first cards go out while the remaining rows are still being read
+        return stream_chunks("index.html", products=iter_products_page(cursor=cursor, fields=fields))
+
+    # Rendered once per catalog version and cursor, then served from memory;
+    # reading the shared revision first drops pages another process outdated
+    get_catalog_validator()
+    try:
+        return cached_page('home', render, cursor, stream=stream if app.config['TEMPLATE_STREAMING'] else None)
+    except ValueError:
+        # Stale or hand-edited cursor: start over from the first page
+        return redirect(url_for('home'))
+
+# Serves fingerprinted static files, precompressed and cacheable for a year
+@app.route("/assets/<path:filename>")
+def asset(filename):
+    from backend.assets import send_asset
+    return send_asset(filename)
 
 # Renders login page
 @app.route("/login")
@@ -45,7 +135,15 @@ def wishlist():
         return redirect(url_for('login'))
 
     username = session.get('username', 'User')
-    return render_template("wishlist.html", username=username)
+    if not app.config['TEMPLATE_STREAMING']:
+        # Items are loaded by static/js/wishlist.js
+        return render_template("wishlist.html", username=username)
+
+    from backend.db_utils import iter_user_wishlist
+    from backend.templating import stream_page
+
+    # Rows are rendered server-side as they come off the cursor
+    return stream_page("wishlist.html", username=username, products=iter_user_wishlist(session['user_id']))
 
 @app.route("/profile")
 def profile():
@@ -57,10 +155,21 @@ def profile():
 
     return render_template("profile.html")
 
+def _server_busy():
+    """503 for when password hashing is saturated; clients should retry shortly"""
+    response = jsonify({
+        'success': False,
+        'error': 'Server busy, please try again'
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
 # Backend Logic for login; recieves a json object and
 @app.route("/api/login", methods=["POST"])
 def api_login():
     from backend.db_utils import authenticate_user
+    from backend.passwords import PasswordPoolBusy
     from flask import session
 
     data = request.get_json()
@@ -71,7 +180,10 @@ def api_login():
     if not username or not password:
         return jsonify({'success': False, 'error': 'Missing credentials'})
 
-    user = authenticate_user(username, password)
+    try:
+        user = authenticate_user(username, password)
+    except PasswordPoolBusy:
+        return _server_busy()
 
     if user:
         # Store user info in session
@@ -94,6 +206,7 @@ def api_login():
 def api_register():
     
     from backend.db_utils import create_user
+    from backend.passwords import PasswordPoolBusy
 
     data = request.get_json()
 
@@ -104,7 +217,10 @@ def api_register():
     if not username or not password or not email:
         return jsonify({'success': False, 'error': 'Missing credentials'})
     
-    user_data = create_user(username, email, password)
+    try:
+        user_data = create_user(username, email, password)
+    except PasswordPoolBusy:
+        return _server_busy()
 
     if user_data:
         return jsonify({
@@ -149,34 +265,71 @@ def auth_status():
 # Product Endpoints
 @app.route("/api/products", methods=['GET'])
 def get_products():
-    from backend.db_utils import get_all_products
-
-    # Get all products from database
-    products = get_all_products()
-
-    # Convert each product to a dictionary
-    products_list = []
-    for product in products:
-        products_list.append({
-            'id': product.id,
-            'name': product.name,
-            'category': product.category,
-            'price': product.price,
-            'description': product.description,
-            'image_url': product.image_url,
-            'external_link': product.external_link
-        })
+    from backend.db_utils import get_products_page, get_product_facets, get_catalog_validator
+    from backend.conditional import make_etag, is_not_modified, not_modified, add_validators
+    from backend.serializers import products_response
+    from backend.listing import parse_filters, DEFAULT_SORT
+
+    sort = request.args.get('sort', DEFAULT_SORT)
+    # Optional comma separated column list, e.g. ?fields=name,price,image_url
+    fields = request.args.get('fields')
+    if fields:
+        fields = [f.strip() for f in fields.split(',') if f.strip()]
+
+    # Popularity (the sort or the wishlist_count field) moves with every
+    # wishlist change, which leaves the catalog validator alone: read the
+    # page live and fold what it shows into the ETag instead
+    live = sort == 'popularity' or 'wishlist_count' in (fields or ())
+
+    # Answer repeat polls with a 304 before any product rows are loaded
+    last_modified, revision = get_catalog_validator()
+    etag = make_etag('products', last_modified, revision, request.query_string.decode())
+    if not live and is_not_modified(etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    # Optional filters and sort, e.g. ?category=Audio&max_price=300&sort=-price
+    load_page = get_products_page.uncached if live else get_products_page
+    try:
+        filters = parse_filters(request.args)
+        rows, next_cursor = load_page(
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor'),
+            fields=fields,
+            sort=sort,
+            **filters
+        )
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
 
-    return jsonify({
-        'success': True,
-        'products': products_list,
-        'count': len(products_list)
-    })
+    if live:
+        etag = make_etag(etag, *((row.id, getattr(row, 'sort_value', None), getattr(row, 'wishlist_count', None))
+                                 for row in rows))
+        if is_not_modified(etag, last_modified):
+            return not_modified(etag, last_modified)
+
+    envelope = {'next_cursor': next_cursor}
+    if request.args.get('facets') in ('1', 'true'):
+        # Per-category counts for the current filters, e.g. for a filter sidebar
+        envelope['facets'] = {'category': get_product_facets(**filters)}
+
+    # Each row only carries the selected columns
+    response = products_response(rows, fields=fields, **envelope)
+    return add_validators(response, etag, last_modified)
     
 
 @app.route("/api/products/<int:product_id>", methods=['GET'])
 def get_product(product_id):
-    from backend.db_utils import get_product_by_id
+    from backend.db_utils import get_product_by_id, get_product_validator
+    from backend.conditional import make_etag, is_not_modified, not_modified, add_validators
+    from backend.serializers import product_response
+
+    exists, last_modified = get_product_validator(product_id)
+    etag = make_etag('product', product_id, last_modified)
+    if exists and is_not_modified(etag, last_modified):
+        return not_modified(etag, last_modified)
 
     product = get_product_by_id(product_id)
 
@@ -186,26 +339,104 @@ def get_product(product_id):
             'error': 'Product not found'
         }), 404
 
-    return jsonify({
-        'success': True,
-        'product': {
-            'id': product.id,
-            'name': product.name,
-            'category': product.category,
-            'price': product.price,
-            'description': product.description,
-            'image_url': product.image_url,
-            'external_link': product.external_link
-        }
-    })
+    response = product_response(product)
+    return add_validators(response, etag, last_modified)
+
+@app.route("/api/products/popular", methods=['GET'])
+def get_popular_products():
+    from backend.db_utils import get_popular_products as load_popular
+    from backend.conditional import make_etag, is_not_modified, not_modified, add_validators
+    from backend.serializers import products_response, PRODUCT_FIELDS
+
+    # Every public field plus the count by default, e.g. ?fields=name,wishlist_count
+    fields = request.args.get('fields')
+    if fields:
+        fields = [f.strip() for f in fields.split(',') if f.strip()]
+    else:
+        fields = list(PRODUCT_FIELDS) + ['wishlist_count']
+
+    try:
+        rows = load_popular(
+            limit=request.args.get('limit', 10, type=int),
+            category=request.args.get('category') or None,
+            fields=fields
+        )
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+    # Read live from the wishlist_count index, so the ETag follows the rows
+    etag = make_etag('popular', request.query_string.decode(),
+                     *((row.id, row.updated_at, getattr(row, 'wishlist_count', None)) for row in rows))
+    if is_not_modified(etag):
+        return not_modified(etag)
+
+    response = products_response(rows, fields=fields)
+    return add_validators(response, etag)
 
 @app.route("/api/products/search", methods=['GET'])
 def search_products():
-    pass
+    from backend.db_utils import search_products as run_search, get_catalog_validator
+    from backend.conditional import make_etag, is_not_modified, not_modified, add_validators
+    from backend.serializers import products_response
+
+    query = request.args.get('q', '').strip()
+    limit = request.args.get('limit', 20, type=int)
+    cursor = request.args.get('cursor')
+
+    if not query:
+        return jsonify({
+            'success': False,
+            'error': 'Missing search query'
+        }), 400
+
+    last_modified, revision = get_catalog_validator()
+    etag = make_etag('search', last_modified, revision, request.query_string.decode())
+    if is_not_modified(etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    try:
+        products, next_cursor = run_search(query, limit=limit, cursor=cursor)
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid cursor'
+        }), 400
+
+    response = products_response(products, next_cursor=next_cursor)
+    return add_validators(response, etag, last_modified)
+
+@app.route("/api/products/export", methods=['GET'])
+def export_products():
+    from backend.exporter import export_chunks, FORMATS, MIMETYPES
+    from datetime import datetime
+
+    file_format = request.args.get('format', 'csv')
+    compress = request.args.get('gzip', '0') in ('1', 'true', 'yes')
+
+    if file_format not in FORMATS:
+        return jsonify({
+            'success': False,
+            'error': f"Unsupported format, use one of: {', '.join(FORMATS)}"
+        }), 400
+
+    filename = f"products_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{file_format}"
+    mimetype = MIMETYPES[file_format]
+    if compress:
+        filename += '.gz'
+        mimetype = 'application/gzip'
+
+    # Chunks are produced while the query is still running
+    response = app.response_class(export_chunks(file_format, compress), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
 @app.route("/api/products", methods=['POST'])
 def create_product():
     from backend.db_utils import add_product
+    from backend.serializers import product_response
 
     data = request.get_json()
 
@@ -236,18 +467,7 @@ def create_product():
     )
 
     if product:
-        return jsonify({
-            'success': True,
-            'product': {
-                'id': product.id,
-                'name': product.name,
-                'description': product.description,
-                'price': product.price,
-                'image_url': product.image_url,
-                'external_link': product.external_link,
-                'category': product.category
-            }
-        }), 201
+        return product_response(product, status=201)
     else:
         return jsonify({
             'success': False,
@@ -266,7 +486,7 @@ def delete_product(product_id):
 # Wishlist Endpoints
 @app.route("/api/wishlist", methods=['POST'])
 def add_to_wishlist_api():
-    from backend.db_utils import add_to_wishlist
+    from backend.db_utils import add_to_wishlist_batch
     from flask import session
 
     # Check authentication
@@ -285,23 +505,37 @@ def add_to_wishlist_api():
             'error': 'Missing product_id'
         }), 400
 
+    try:
+        product_id = int(product_id)
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'error': 'Invalid product_id'
+        }), 400
+
     user_id = session['user_id']
-    wishlist_item = add_to_wishlist(user_id, product_id)
+    status = add_to_wishlist_batch(user_id, [product_id])[product_id]
 
-    if wishlist_item:
+    if status == 'added':
         return jsonify({
             'success': True,
             'message': 'Product added to wishlist'
         }), 201
-    else:
+    elif status == 'exists':
         return jsonify({
             'success': False,
             'error': 'Product already in wishlist'
         }), 409
+    else:
+        return jsonify({
+            'success': False,
+            'error': 'Product not found'
+        }), 404
 
 @app.route("/api/wishlist", methods=['GET'])
 def get_user_wishlist_api():
-    from backend.db_utils import get_user_wishlist
+    from backend.db_utils import get_user_wishlist_page
+    from backend.serializers import products_response
     from flask import session
 
     # Check authentication
@@ -312,30 +546,25 @@ def get_user_wishlist_api():
         }), 401
 
     user_id = session['user_id']
-    wishlist_products = get_user_wishlist(user_id)
-
-    # Convert products to JSON format
-    products_list = []
-    for product in wishlist_products:
-        products_list.append({
-            'id': product.id,
-            'name': product.name,
-            'description': product.description,
-            'price': product.price,
-            'image_url': product.image_url,
-            'external_link': product.external_link,
-            'category': product.category
-        })
 
-    return jsonify({
-        'success': True,
-        'products': products_list,
-        'count': len(products_list)
-    })
+    # Paging is opt-in: without ?limit= the whole wishlist is returned
+    try:
+        wishlist_products, next_cursor = get_user_wishlist_page(
+            user_id,
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor')
+        )
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid cursor'
+        }), 400
+
+    return products_response(wishlist_products, next_cursor=next_cursor)
 
 @app.route("/api/wishlist", methods=['DELETE'])
 def remove_from_wishlist_api():
-    from backend.db_utils import remove_from_wishlist
+    from backend.db_utils import remove_from_wishlist_batch
     from flask import session
 
     # Check authentication
@@ -354,10 +583,18 @@ def remove_from_wishlist_api():
             'error': 'Missing product_id'
         }), 400
 
+    try:
+        product_id = int(product_id)
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'error': 'Invalid product_id'
+        }), 400
+
     user_id = session['user_id']
-    success = remove_from_wishlist(user_id, product_id)
+    status = remove_from_wishlist_batch(user_id, [product_id])[product_id]
 
-    if success:
+    if status == 'removed':
         return jsonify({
             'success': True,
             'message': 'Product removed from wishlist'
@@ -369,7 +606,92 @@ def remove_from_wishlist_api():
         }), 404
 
 
+def _wishlist_batch_request():
+    """
+    Validate a {"product_ids": [...]} body for the batch wishlist endpoints
+    Returns: (user_id, product_ids, None) or (None, None, error response)
+    """
+    from backend.db_utils import MAX_WISHLIST_BATCH
+    from flask import session
+
+    if 'user_id' not in session:
+        return None, None, (jsonify({
+            'success': False,
+            'error': 'Not authenticated'
+        }), 401)
+
+    data = request.get_json(silent=True) or {}
+    product_ids = data.get('product_ids')
+
+    if (not isinstance(product_ids, list) or not product_ids
+            or not all(isinstance(pid, int) and not isinstance(pid, bool) for pid in product_ids)):
+        return None, None, (jsonify({
+            'success': False,
+            'error': 'product_ids must be a non-empty list of integers'
+        }), 400)
+
+    if len(product_ids) > MAX_WISHLIST_BATCH:
+        return None, None, (jsonify({
+            'success': False,
+            'error': f'At most {MAX_WISHLIST_BATCH} product_ids per request'
+        }), 400)
+
+    return session['user_id'], product_ids, None
+
+
+@app.route("/api/wishlist/batch", methods=['POST'])
+def add_to_wishlist_batch_api():
+    from backend.db_utils import add_to_wishlist_batch
+
+    user_id, product_ids, error = _wishlist_batch_request()
+    if error:
+        return error
+
+    outcomes = add_to_wishlist_batch(user_id, product_ids)
+
+    return jsonify({
+        'success': True,
+        'results': [{'product_id': pid, 'status': status} for pid, status in outcomes.items()],
+        'added': sum(1 for status in outcomes.values() if status == 'added')
+    })
+
+
+@app.route("/api/wishlist/batch", methods=['DELETE'])
+def remove_from_wishlist_batch_api():
+    from backend.db_utils import remove_from_wishlist_batch
+
+    user_id, product_ids, error = _wishlist_batch_request()
+    if error:
+        return error
+
+    outcomes = remove_from_wishlist_batch(user_id, product_ids)
+
+    return jsonify({
+        'success': True,
+        'results': [{'product_id': pid, 'status': status} for pid, status in outcomes.items()],
+        'removed': sum(1 for status in outcomes.values() if status == 'removed')
+    })
+
+
 # User Endpoints
+@app.route("/api/users/available", methods=['GET'])
+def check_user_available():
+    from backend.db_utils import is_user_field_available
+
+    checks = {}
+    for field in ('username', 'email'):
+        value = request.args.get(field, '').strip()
+        if value:
+            checks[field] = {'available': is_user_field_available(field, value)}
+
+    if not checks:
+        return jsonify({
+            'success': False,
+            'error': 'Provide username and/or email'
+        }), 400
+
+    return jsonify({'success': True, **checks})
+
 @app.route("/api/users/<int:user_id>", methods=['GET'])
 def get_user(user_id):
     from backend.db_utils import get_user_by_id
@@ -421,7 +743,36 @@ def delete_user(user_id):
 # Category Endpoints
 @app.route("/api/categories", methods=['GET'])
 def get_categories():
-    pass
+    from backend.db_utils import get_categories as load_categories, get_catalog_validator
+    from backend.conditional import make_etag, is_not_modified, not_modified, add_validators
+
+    # The summary table only changes with product writes, which all move the
+    # shared revision; reading it also drops cached categories it outdated
+    last_modified, revision = get_catalog_validator()
+    etag = make_etag('categories', last_modified, revision)
+    if is_not_modified(etag, last_modified):
+        return not_modified(etag, last_modified)
+
+    # Served from the category summary table via the catalog cache
+    categories = load_categories()
+
+    response = jsonify({
+        'success': True,
+        'count': len(categories),
+        'categories': categories
+    })
+    return add_validators(response, etag, last_modified)
+
+
+# Prometheus scrape endpoint; counts are for the worker process that answers
+@app.route("/metrics", methods=['GET'])
+def metrics():
+    from backend.metrics import render_prometheus
+    from flask import Response, abort
+
+    if not app.config['METRICS_ENABLED']:
+        abort(404)
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
 
 if __name__ == "__main__":
     app.run(debug=True, port=5001)
@@ -0,0 +1,155 @@
+"""
+Fingerprinted static assets
+scripts/build_assets.py copies css/js/icons into a build directory under
+content-hashed names, writes .gz (and .br when brotli is installed)
+siblings for text assets, and records the mapping in manifest.json.
+Templates link assets through asset_url(); hashed files are served with a
+one-year immutable Cache-Control, picking the precompressed sibling that
+matches Accept-Encoding. Without a manifest, asset_url() falls back to the
+plain /static URL so a fresh checkout works before the first build
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import threading
+
+from flask import current_app, request, send_from_directory, url_for, abort
+
+try:
+    import brotli
+except ImportError:  # optional dependency, only .gz siblings are written
+    brotli = None
+
+
+ASSET_DIRS = ('css', 'js', 'icons')
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json')
+MANIFEST_NAME = 'manifest.json'
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Stored encodings in preference order, with their file suffix
+_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def _fingerprint(path):
+    """Short content hash of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(65536), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def _write_compressed(path):
+    """Write .gz (and .br) siblings next to path; returns how many were written"""
+    with open(path, 'rb') as source:
+        data = source.read()
+
+    # mtime=0 keeps the .gz byte-identical between builds
+    with open(path + '.gz', 'wb') as out:
+        out.write(gzip.compress(data, compresslevel=9, mtime=0))
+    written = 1
+
+    if brotli is not None:
+        with open(path + '.br', 'wb') as out:
+            out.write(brotli.compress(data, quality=11))
+        written += 1
+    return written
+
+
+def build_assets(static_folder, build_dir, clean=False):
+    """
+    Fingerprint and precompress every asset under ASSET_DIRS
+    Files keep their relative path with the hash before the extension,
+    e.g. css/style.css -> css/style.3f2a9c1b7d4e.css
+    Returns: the manifest dict {source path: hashed path}
+    """
+    if clean and os.path.isdir(build_dir):
+        shutil.rmtree(build_dir)
+
+    manifest = {}
+    for asset_dir in ASSET_DIRS:
+        source_dir = os.path.join(static_folder, asset_dir)
+        if not os.path.isdir(source_dir):
+            continue
+
+        for root, _, files in os.walk(source_dir):
+            for name in sorted(files):
+                source = os.path.join(root, name)
+                logical = os.path.relpath(source, static_folder).replace(os.sep, '/')
+                stem, ext = os.path.splitext(logical)
+                hashed = f"{stem}.{_fingerprint(source)}{ext}"
+
+                target = os.path.join(build_dir, hashed)
+                if not os.path.exists(target):
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    shutil.copyfile(source, target)
+                    if ext.lower() in COMPRESSIBLE:
+                        _write_compressed(target)
+                manifest[logical] = hashed
+
+    os.makedirs(build_dir, exist_ok=True)
+    with open(os.path.join(build_dir, MANIFEST_NAME), 'w', encoding='utf-8') as out:
+        json.dump(manifest, out, indent=2, sort_keys=True)
+    return manifest
+
+
+def _build_dir():
+    return current_app.config['ASSET_BUILD_DIR']
+
+
+def load_manifest():
+    """Manifest for this process, read once; empty if no build has been run"""
+    global _manifest
+    if _manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                try:
+                    with open(os.path.join(_build_dir(), MANIFEST_NAME), encoding='utf-8') as source:
+                        _manifest = json.load(source)
+                except FileNotFoundError:
+                    _manifest = {}
+    return _manifest
+
+
+def asset_url(filename):
+    """
+    Template helper: URL of the fingerprinted copy of a static file
+    e.g. asset_url('css/style.css') -> /assets/css/style.3f2a9c1b7d4e.css
+    """
+    hashed = load_manifest().get(filename)
+    if hashed is None:
+        return url_for('static', filename=filename)
+    return url_for('asset', filename=hashed)
+
+
+def send_asset(filename):
+    """
+    Serve a fingerprinted file, precompressed when the client accepts it
+    The name changes whenever the content does, so clients may keep it forever
+    """
+    build_dir = _build_dir()
+    if filename == MANIFEST_NAME or filename.endswith(('.gz', '.br')):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    served, encoding = filename, None
+    for candidate, suffix in _ENCODINGS:
+        if request.accept_encodings[candidate] and os.path.isfile(os.path.join(build_dir, filename + suffix)):
+            served, encoding = filename + suffix, candidate
+            break
+
+    response = send_from_directory(build_dir, served, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if filename.endswith(COMPRESSIBLE):
+        response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -0,0 +1,89 @@
+"""
+Bloom filters answering "is this username/email definitely free?" in memory
+A negative answer is exact, so only names that might be taken reach the
+database; deleted users simply stay as false positives until a rebuild.
+Filters are per process: a user registered through another worker is only
+seen after a rebuild, which is fine because the unique indexes still have
+the final say at insert time
+"""
+
+import hashlib
+import math
+import threading
+
+from app import app, db
+from backend.models import User
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+_filters = {}
+_lock = threading.Lock()
+
+
+def _build():
+    """Build one filter per unique column from a streamed read of users"""
+    with app.app_context():
+        total = db.session.query(db.func.count(User.id)).scalar()
+        capacity = max(total * 2, app.config.get('USER_BLOOM_MIN_CAPACITY', 10000))
+        filters = {'username': BloomFilter(capacity), 'email': BloomFilter(capacity)}
+
+        result = db.session.execute(
+            db.select(User.username, User.email),
+            execution_options={'yield_per': 5000}
+        )
+        for username, email in result:
+            filters['username'].add(username)
+            filters['email'].add(email)
+    return filters
+
+
+def _get_filters():
+    """Filters for this process, (re)built on first use or once over capacity"""
+    global _filters
+    with _lock:
+        if not _filters or any(f.count > f.capacity for f in _filters.values()):
+            _filters = _build()
+        return _filters
+
+
+def warm():
+    """Build the filters ahead of the first availability check"""
+    _get_filters()
+
+
+def might_exist(field, value):
+    """False means value is definitely not taken; True means ask the database"""
+    return value in _get_filters()[field]
+
+
+def record_user(username, email):
+    """Add a newly created user so the filters stay complete"""
+    with _lock:
+        if _filters:
+            _filters['username'].add(username)
+            _filters['email'].add(email)
@@ -0,0 +1,147 @@
+"""
+In-process caching for catalog reads
+Entries are keyed by the catalog version, which product writes bump, so a
+write invalidates every cached read at once. Writes made by other processes
+(other server workers, scripts/db_admin.py) are picked up the next time a
+catalog validator is read (see sync_catalog_version); the TTL bounds
+staleness for reads that are not preceded by one
+"""
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe, size-bounded LRU cache with a per-entry time to live"""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entries"""
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader() to fill a miss"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Return counters for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Catalog version: bumped by every product write in this process, and when
+# the shared catalog revision shows another process has written
+_version = 0
+_shared_revision = None
+_version_lock = threading.Lock()
+
+
+def catalog_version():
+    """Return the current catalog version"""
+    return _version
+
+
+def bump_catalog_version():
+    """Invalidate every catalog read cached under the previous version"""
+    global _version
+    with _version_lock:
+        _version += 1
+        return _version
+
+
+def sync_catalog_version(revision):
+    """Invalidate the cached catalog reads if the shared revision (backend.catalog_state) moved"""
+    global _version, _shared_revision
+    with _version_lock:
+        if revision != _shared_revision:
+            if _shared_revision is not None:
+                _version += 1
+            _shared_revision = revision
+
+
+def _freeze(value):
+    """Make list arguments usable as part of a cache key"""
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+def catalog_cached(cache, kind):
+    """
+    Decorator caching a catalog read under (kind, catalog version, arguments)
+    Cached results are shared between callers and must not be mutated
+    The undecorated function stays available as .uncached
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (
+                kind,
+                catalog_version(),
+                tuple(_freeze(a) for a in args),
+                tuple(sorted((k, _freeze(v)) for k, v in kwargs.items()))
+            )
+            return cache.get_or_load(key, lambda: func(*args, **kwargs))
+
+        wrapper.uncached = func
+        return wrapper
+    return decorator
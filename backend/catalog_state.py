@@ -0,0 +1,73 @@
+"""
+Catalog revision shared by every process
+A one-row table holds a counter and the time of the last product write.
+Every product write (db_utils, the importer, scripts/db_admin.py) bumps it
+in its own transaction, deletions included, so all server workers read the
+same value: it is the catalog's ETag/Last-Modified validator, and a worker
+that sees it move knows another process has written (see
+db_utils.get_catalog_validator)
+"""
+
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app import db
+
+
+STATE_TABLE = 'catalog_state'
+
+# Engines whose state table has already been verified in this process
+_ready_engines = set()
+
+
+def ensure_catalog_state():
+    """
+    Create the state table (revision 0) if it does not exist yet
+    Must be called inside an app context
+    """
+    engine = db.engine
+    if engine.url in _ready_engines:
+        return
+
+    exists = db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': STATE_TABLE}
+    ).first()
+
+    if not exists:
+        db.session.execute(text(
+            f"CREATE TABLE {STATE_TABLE} ("
+            "id INTEGER PRIMARY KEY CHECK (id = 1), "
+            "revision INTEGER NOT NULL, "
+            "changed_at TEXT NOT NULL"
+            ")"
+        ))
+        db.session.execute(
+            text(f"INSERT INTO {STATE_TABLE} (id, revision, changed_at) VALUES (1, 0, :now)"),
+            {'now': datetime.utcnow().isoformat()}
+        )
+        db.session.commit()
+        print("Catalog state created")
+
+    _ready_engines.add(engine.url)
+
+
+def record_change():
+    """Bump the revision for a product write; runs in the caller's transaction"""
+    db.session.execute(
+        text(f"UPDATE {STATE_TABLE} SET revision = revision + 1, changed_at = :now WHERE id = 1"),
+        {'now': datetime.utcnow().isoformat()}
+    )
+
+
+def read_catalog_state():
+    """
+    Current revision, one primary key lookup
+    Returns: (time of the last product write as a naive UTC datetime, revision)
+    """
+    ensure_catalog_state()
+    revision, changed_at = db.session.execute(
+        text(f"SELECT revision, changed_at FROM {STATE_TABLE} WHERE id = 1")
+    ).one()
+    return datetime.fromisoformat(changed_at), revision
@@ -0,0 +1,159 @@
+"""
+Per-category product counts and price ranges kept in a small summary table
+The product write functions in db_utils (and the importer) update it
+incrementally, so listing categories never aggregates the products table.
+Only a removal that takes out a category's cheapest or dearest product
+re-reads that category's min/max, which the (category, price) index
+answers without a scan. Uncategorized products are not counted
+"""
+
+from sqlalchemy import text
+
+from app import db
+
+
+STATS_TABLE = 'category_stats'
+
+# Engines whose summary table has already been verified in this process
+_ready_engines = set()
+
+
+def ensure_category_stats():
+    """
+    Create the summary table if it does not exist yet
+    A freshly created table is filled from the products table
+    Must be called inside an app context
+    """
+    engine = db.engine
+    if engine.url in _ready_engines:
+        return
+
+    exists = db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': STATS_TABLE}
+    ).first()
+
+    if not exists:
+        db.session.execute(text(
+            f"CREATE TABLE {STATS_TABLE} ("
+            "category TEXT PRIMARY KEY, "
+            "product_count INTEGER NOT NULL, "
+            "min_price REAL NOT NULL, "
+            "max_price REAL NOT NULL"
+            ") WITHOUT ROWID"
+        ))
+        _populate_stats()
+        db.session.commit()
+        print("Category stats created")
+
+    _ready_engines.add(engine.url)
+
+
+def rebuild_category_stats():
+    """Recompute every category from the products table (repairs any drift)"""
+    ensure_category_stats()
+    db.session.execute(text(f"DELETE FROM {STATS_TABLE}"))
+    _populate_stats()
+    db.session.commit()
+
+
+def _populate_stats():
+    """Aggregate the products table into the summary table in one statement"""
+    db.session.execute(text(
+        f"INSERT INTO {STATS_TABLE} (category, product_count, min_price, max_price) "
+        "SELECT category, COUNT(*), MIN(price), MAX(price) FROM products "
+        "WHERE category IS NOT NULL GROUP BY category"
+    ))
+
+
+def _group(rows):
+    """(category, price) pairs -> {category: [count, min price, max price]}"""
+    grouped = {}
+    for category, price in rows:
+        if category is None or price is None:
+            continue
+        entry = grouped.get(category)
+        if entry is None:
+            grouped[category] = [1, price, price]
+        else:
+            entry[0] += 1
+            entry[1] = min(entry[1], price)
+            entry[2] = max(entry[2], price)
+    return grouped
+
+
+def record_added(rows):
+    """
+    Count newly inserted products, given as (category, price) pairs
+    Runs in the caller's transaction
+    """
+    grouped = _group(rows)
+    if not grouped:
+        return
+    db.session.execute(
+        text(
+            f"INSERT INTO {STATS_TABLE} (category, product_count, min_price, max_price) "
+            "VALUES (:category, :count, :low, :high) "
+            "ON CONFLICT (category) DO UPDATE SET "
+            "product_count = product_count + excluded.product_count, "
+            "min_price = MIN(min_price, excluded.min_price), "
+            "max_price = MAX(max_price, excluded.max_price)"
+        ),
+        [
+            {'category': category, 'count': count, 'low': low, 'high': high}
+            for category, (count, low, high) in grouped.items()
+        ]
+    )
+
+
+def record_removed(rows):
+    """
+    Uncount removed products, given as (category, price) pairs
+    Runs in the caller's transaction, after the removal has been flushed
+    """
+    for category, (count, low, high) in _group(rows).items():
+        row = db.session.execute(
+            text(
+                f"UPDATE {STATS_TABLE} SET product_count = product_count - :count "
+                "WHERE category = :category RETURNING product_count, min_price, max_price"
+            ),
+            {'category': category, 'count': count}
+        ).first()
+        if row is None:
+            continue
+
+        remaining, min_price, max_price = row
+        if remaining <= 0:
+            db.session.execute(
+                text(f"DELETE FROM {STATS_TABLE} WHERE category = :category"),
+                {'category': category}
+            )
+        elif low <= min_price or high >= max_price:
+            # A boundary product went away: two index seeks on (category, price)
+            db.session.execute(
+                text(
+                    f"UPDATE {STATS_TABLE} SET (min_price, max_price) = "
+                    "(SELECT MIN(price), MAX(price) FROM products WHERE category = :category) "
+                    "WHERE category = :category"
+                ),
+                {'category': category}
+            )
+
+
+def record_changed(before, after):
+    """Move one product between (category, price) states; runs in the caller's transaction"""
+    if before != after:
+        record_removed([before])
+        record_added([after])
+
+
+def list_category_stats():
+    """Every category with its product count and price range, by name"""
+    ensure_category_stats()
+    rows = db.session.execute(text(
+        f"SELECT category, product_count, min_price, max_price FROM {STATS_TABLE} ORDER BY category"
+    ))
+    return [
+        {'name': category, 'product_count': count, 'min_price': low, 'max_price': high}
+        for category, count, low, high in rows
+    ]
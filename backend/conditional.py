@@ -0,0 +1,51 @@
+"""
+Conditional GET helpers (ETag / Last-Modified) for the catalog endpoints
+Routes compute a validator first and return early with a 304, before any
+product rows are loaded or serialized
+"""
+
+import hashlib
+from datetime import timezone
+
+from flask import request, make_response
+
+
+def make_etag(*parts):
+    """Build a strong ETag value from the parts that identify a response body"""
+    raw = '|'.join(str(part) for part in parts).encode()
+    return hashlib.sha1(raw).hexdigest()[:24]
+
+
+def _http_date(last_modified):
+    """Naive UTC datetime from the database -> aware, second precision"""
+    if last_modified is None:
+        return None
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def is_not_modified(etag, last_modified=None):
+    """
+    True if the client's cached copy is still current
+    If-None-Match wins over If-Modified-Since when both are sent
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+
+    last_modified = _http_date(last_modified)
+    if last_modified and request.if_modified_since:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def add_validators(response, etag, last_modified=None):
+    """Attach ETag/Last-Modified and ask clients to revalidate before reuse"""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _http_date(last_modified)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def not_modified(etag, last_modified=None):
+    """Empty 304 response carrying the current validators"""
+    return add_validators(make_response('', 304), etag, last_modified)
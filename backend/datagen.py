@@ -0,0 +1,212 @@
+"""
+Deterministic synthetic dataset for capacity and performance testing
+Builds N products across the site's categories with per-category
+log-normal prices, M users sharing one pre-computed password hash, and
+wishlists whose product choice follows a Zipf distribution (a few
+products are on a large share of wishlists, most on very few). The same
+seed always produces the same products, users and wishlists.
+Products go through the streaming importer (so search and category stats
+are maintained too); users and wishlists are bulk inserted in chunks
+"""
+
+import bisect
+import itertools
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from app import app, db
+from backend.models import User, Product, WishlistItem
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from backend import importer, popularity
+from backend.passwords import hash_method
+
+
+# category -> (share of the catalog, median price, price spread (log sigma), icon)
+CATEGORY_PROFILES = {
+    'Audio': (0.22, 150.0, 0.7, 'icons/headphones.png'),
+    'Laptops': (0.15, 1100.0, 0.45, 'icons/lenovo.png'),
+    'PC Components': (0.25, 300.0, 0.9, 'icons/graphic.png'),
+    'Smartphones': (0.15, 700.0, 0.45, 'icons/iphone.png'),
+    'Tablets': (0.10, 450.0, 0.5, 'icons/ipad.png'),
+    'Wearables': (0.13, 250.0, 0.5, 'icons/applewatch.png'),
+}
+
+BRANDS = ('Apple', 'Samsung', 'Lenovo', 'Sony', 'Dell', 'Asus', 'Google', 'Bose',
+          'Logitech', 'Corsair', 'Garmin', 'Microsoft', 'HP', 'Acer', 'Razer', 'Anker')
+LINES = ('Pro', 'Air', 'Max', 'Ultra', 'Lite', 'Plus', 'Edge', 'Neo', 'Studio', 'One')
+FEATURES = ('all-day battery', 'a bright OLED display', 'fast charging', 'low latency',
+            'a premium aluminium build', 'active noise cancelling', 'Wi-Fi 7',
+            'a 120Hz refresh rate', 'studio-grade sound', 'long-term software updates')
+
+DEFAULT_SEED = 42
+DEFAULT_SKEW = 1.1
+DEFAULT_PASSWORD = 'password123'
+
+# Timestamps are spread over the year before this fixed date, so reruns match
+EPOCH = datetime(2025, 1, 1)
+
+USER_CHUNK_SIZE = 10000
+WISHLIST_CHUNK_SIZE = 50000
+
+
+def _price(rng, median, sigma):
+    """Log-normal price rounded to a .99 ending"""
+    value = rng.lognormvariate(math.log(median), sigma)
+    return max(4.99, round(value) - 0.01)
+
+
+def iter_products(count, rng):
+    """Yield count importer-ready product dicts"""
+    names = list(CATEGORY_PROFILES)
+    weights = list(itertools.accumulate(profile[0] for profile in CATEGORY_PROFILES.values()))
+
+    for serial in range(1, count + 1):
+        category = names[bisect.bisect_left(weights, rng.random() * weights[-1])]
+        _, median, sigma, icon = CATEGORY_PROFILES[category]
+        brand = rng.choice(BRANDS)
+        line = rng.choice(LINES)
+        first, second = rng.sample(FEATURES, 2)
+        created = EPOCH - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+
+        yield {
+            # The serial keeps names unique, which the importer de-duplicates on
+            'name': f"{brand} {category.rstrip('s')} {line} {serial}",
+            'description': f"{brand} {line} with {first} and {second}.",
+            'price': _price(rng, median, sigma),
+            'category': category,
+            'image_url': icon,
+            'external_link': f"https://example.com/products/{serial}",
+            'created_at': created,
+            'updated_at': created,
+        }
+
+
+def create_users(count, rng, password=DEFAULT_PASSWORD, chunk_size=USER_CHUNK_SIZE):
+    """
+    Bulk insert count users named user0000001... that all log in with password
+    The hash is computed once and shared, so no time goes into pbkdf2
+    Returns: list of the new user ids
+    """
+    password_hash = generate_password_hash(password, hash_method())
+    start = (db.session.execute(db.select(db.func.max(User.id))).scalar() or 0) + 1
+    width = max(7, len(str(start + count)))
+    ids = []
+
+    for first in range(start, start + count, chunk_size):
+        rows = []
+        for number in range(first, min(first + chunk_size, start + count)):
+            created = EPOCH - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+            rows.append({
+                'username': f"user{number:0{width}d}",
+                'email': f"user{number:0{width}d}@example.com",
+                'password_hash': password_hash,
+                'created_at': created,
+                'updated_at': created,
+            })
+        ids.extend(db.session.execute(db.insert(User).returning(User.id), rows).scalars())
+        db.session.commit()
+    return ids
+
+
+def zipf_sampler(product_ids, rng, skew=DEFAULT_SKEW):
+    """
+    Function drawing one product id with Zipf(skew) probabilities
+    Popularity ranks are shuffled so popular products are spread across ids
+    """
+    ranked = list(product_ids)
+    rng.shuffle(ranked)
+    cumulative = list(itertools.accumulate(1.0 / (rank ** skew) for rank in range(1, len(ranked) + 1)))
+    total = cumulative[-1]
+
+    def draw():
+        return ranked[bisect.bisect_left(cumulative, rng.random() * total)]
+    return draw
+
+
+def create_wishlists(user_ids, product_ids, total, rng, skew=DEFAULT_SKEW,
+                     chunk_size=WISHLIST_CHUNK_SIZE, progress=None):
+    """
+    Bulk insert about total wishlist rows spread over user_ids
+    Users get an exponentially distributed number of items (mean total/users),
+    each picked by Zipf popularity; duplicates are skipped
+    Returns: number of rows inserted
+    """
+    if not user_ids or not product_ids or total <= 0:
+        return 0
+
+    draw = zipf_sampler(product_ids, rng, skew)
+    mean = total / len(user_ids)
+    most = len(product_ids)
+    statement = sqlite_insert(WishlistItem).on_conflict_do_nothing(
+        index_elements=['user_id', 'product_id']
+    )
+
+    inserted = 0
+    pending = []
+    for user_id in user_ids:
+        wanted = min(most, max(1, round(rng.expovariate(1 / mean))))
+        chosen = set()
+        # Bounded: with a steep skew the head products come up again and again
+        for _ in range(wanted * 4):
+            chosen.add(draw())
+            if len(chosen) >= wanted:
+                break
+
+        for product_id in chosen:
+            added = EPOCH - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+            pending.append({'user_id': user_id, 'product_id': product_id, 'added_at': added})
+
+        if len(pending) >= chunk_size:
+            inserted += db.session.connection().execute(statement, pending).rowcount
+            db.session.commit()
+            pending = []
+            if progress:
+                progress(inserted)
+
+    if pending:
+        inserted += db.session.connection().execute(statement, pending).rowcount
+        db.session.commit()
+    return inserted
+
+
+def generate(products, users, wishlists, seed=DEFAULT_SEED, skew=DEFAULT_SKEW,
+             password=DEFAULT_PASSWORD, progress=True):
+    """
+    Build the whole dataset into the app's database
+    Returns: dict with what was created and the seconds each step took
+    """
+    rng = random.Random(seed)
+    stats = {}
+
+    def step(name):
+        started = time.perf_counter()
+        if progress:
+            print(f"→ {name}...")
+        return lambda: stats.setdefault('seconds', {}).__setitem__(name, round(time.perf_counter() - started, 2))
+
+    done = step('products')
+    result = importer.import_products(iter_products(products, rng), progress=progress)
+    stats['products'] = result['inserted']
+    done()
+
+    with app.app_context():
+        done = step('users')
+        user_ids = create_users(users, rng, password)
+        stats['users'] = len(user_ids)
+        done()
+
+        done = step('wishlists')
+        product_ids = db.session.execute(db.select(Product.id).order_by(Product.id)).scalars().all()
+        report = (lambda n: print(f"{n:,} wishlist rows inserted")) if progress else None
+        stats['wishlists'] = create_wishlists(user_ids, product_ids, wishlists, rng, skew, progress=report)
+        done()
+
+        done = step('wishlist counts')
+        popularity.reconcile()
+        done()
+
+    return stats
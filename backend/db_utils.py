@@ -1,35 +1,145 @@
 """
 Database utility functions for backend operations
 Use these functions to interact with the database programmatically
+
+Inside a request every function shares the request's session (one connection
+checkout, objects stay attached); outside one, each call opens its own.
+Wrap several writes in unit_of_work() to commit them as one transaction.
 """
 
 import sys
 import os
+from contextlib import contextmanager
+from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from sqlalchemy.exc import IntegrityError
+from flask import g, has_app_context, current_app
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
 from app import app, db
 from backend.models import User, Product, WishlistItem
+from backend import search, categories, catalog_state, listing, popularity, importer, bloom
+from backend.pagination import (
+    encode_cursor, decode_cursor, decode_int_cursor, clamp_limit, LazyPage
+)
+from backend.cache import LRUCache, catalog_cached, bump_catalog_version, sync_catalog_version
+from backend.serializers import resolve_fields
+
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+MAX_WISHLIST_PAGE_SIZE = 200
+MAX_WISHLIST_BATCH = 500
+
+# Rows fetched per round trip when a page is streamed from a cursor
+STREAM_BATCH_SIZE = 100
+
+# Shared by every catalog read below; product writes bump the catalog version.
+# Cached readers always run in their own app context so the objects they
+# return (and share between requests) never belong to a caller's session
+catalog_cache = LRUCache(
+    maxsize=app.config.get('CATALOG_CACHE_SIZE', 1024),
+    ttl=app.config.get('CATALOG_CACHE_TTL', 300)
+)
+
+
+def _has_own_app_context():
+    """
+    True inside a context of this module's app; `python app.py` imports app.py
+    twice, and a context of the __main__ copy is not registered with this db
+    """
+    return has_app_context() and current_app._get_current_object() is app
+
+
+@contextmanager
+def _session_scope():
+    """Reuse the current app context's session, pushing a context only if needed"""
+    if _has_own_app_context():
+        yield db.session
+    else:
+        with app.app_context():
+            yield db.session
+
+
+def _in_unit_of_work():
+    return _has_own_app_context() and g.get('_uow_depth', 0) > 0
+
+
+def _commit():
+    """Commit, or only flush while inside unit_of_work()"""
+    if _in_unit_of_work():
+        db.session.flush()
+    else:
+        db.session.commit()
+
+
+def _after_commit(callback):
+    """Run callback once the surrounding transaction has committed"""
+    if _in_unit_of_work():
+        g._uow_callbacks.append(callback)
+    else:
+        callback()
+
+
+@contextmanager
+def unit_of_work():
+    """
+    Group several db_utils writes into one transaction
+    Usage:
+        with unit_of_work():
+            add_to_wishlist(1, 4)
+            update_product(4, price=899.00)
+    Commits once at the end, rolls everything back if the block raises;
+    nested blocks join the outermost one
+    """
+    with _session_scope() as session:
+        depth = g.get('_uow_depth', 0)
+        if depth == 0:
+            g._uow_callbacks = []
+        g._uow_depth = depth + 1
+
+        try:
+            yield session
+        except Exception:
+            g._uow_depth = depth
+            if depth == 0:
+                session.rollback()
+                g._uow_callbacks = []
+            raise
+
+        g._uow_depth = depth
+        if depth == 0:
+            session.commit()
+            callbacks, g._uow_callbacks = g._uow_callbacks, []
+            for callback in callbacks:
+                callback()
 
 
 def create_user(username, email, password):
     """
     Create a new user
+    Relies on the unique indexes on users.username and users.email instead of
+    checking first, so concurrent signups cannot both succeed
     Returns: dict with user data if successful, None if user already exists
     """
-    with app.app_context():
-        # Check if user already exists
-        if User.query.filter_by(username=username).first():
-            print(f"Error: Username '{username}' already exists")
-            return None
-        if User.query.filter_by(email=email).first():
-            print(f"Error: Email '{email}' already exists")
-            return None
+    # Hash before opening the transaction; it is the slow part
+    user = User(username=username, email=email)
+    user.set_password(password)
 
-        # Create new user
-        user = User(username=username, email=email)
-        user.set_password(password)
+    with _session_scope():
         db.session.add(user)
-        db.session.commit()
+        try:
+            _commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            if _in_unit_of_work():
+                raise
+            field = 'Email' if 'users.email' in str(e.orig) else 'Username'
+            value = email if field == 'Email' else username
+            print(f"Error: {field} '{value}' already exists")
+            return None
 
         # Extract data before session closes
         user_data = {
@@ -38,25 +148,40 @@ def create_user(username, email, password):
             'email': user.email
         }
 
-        print(f"User '{username}' created successfully!")
-        return user_data
+    _after_commit(lambda: bloom.record_user(username, email))
+    print(f"User '{username}' created successfully!")
+    return user_data
+
+
+def is_user_field_available(field, value):
+    """
+    Check whether a username or email is still free
+    field: 'username' or 'email'
+    Names the Bloom filter has never seen are answered without a query
+    """
+    if not bloom.might_exist(field, value):
+        return True
+
+    with _session_scope():
+        column = User.username if field == 'username' else User.email
+        return db.session.query(User.id).filter(column == value).first() is None
 
 
 def get_user_by_username(username):
     """Get a user by username"""
-    with app.app_context():
+    with _session_scope():
         return User.query.filter_by(username=username).first()
 
 
 def get_user_by_email(email):
     """Get a user by email"""
-    with app.app_context():
+    with _session_scope():
         return User.query.filter_by(email=email).first()
     
     
 def get_user_by_id(user_id):
     """Get a user by ID"""
-    with app.app_context():
+    with _session_scope():
         return User.query.filter_by(id=user_id).first()
 
 
@@ -65,13 +190,21 @@ def authenticate_user(username_or_email, password):
     Authenticate a user
     Returns: User object if credentials are valid, None otherwise
     """
-    with app.app_context():
-        # Try to find user by username or email
-        user = User.query.filter_by(username=username_or_email).first()
-        if not user:
-            user = User.query.filter_by(email=username_or_email).first()
+    with _session_scope():
+        # Find user by username or email in one query, preferring a username match
+        user = User.query.filter(
+            db.or_(User.username == username_or_email, User.email == username_or_email)
+        ).order_by(
+            db.case((User.username == username_or_email, 0), else_=1)
+        ).first()
 
         if user and user.check_password(password):
+            # Upgrade hashes made with an older method/cost while we have the password
+            if user.password_needs_rehash():
+                user.set_password(password)
+                _commit()
+                print(f"Password hash upgraded for '{user.username}'")
+
             print(f"Authentication successful for '{username_or_email}'")
             return user
         else:
@@ -79,71 +212,307 @@ def authenticate_user(username_or_email, password):
             return None
 
 
+@catalog_cached(catalog_cache, 'all_products')
 def get_all_products():
     """Get all products from the database"""
     with app.app_context():
         return Product.query.all()
 
 
+@catalog_cached(catalog_cache, 'products_page')
+def get_products_page(limit=DEFAULT_PAGE_SIZE, cursor=None, fields=None, category=None,
+                      min_price=None, max_price=None, q=None, sort=listing.DEFAULT_SORT):
+    """
+    Get one page of products using keyset pagination
+    fields: optional list of columns to select; 'id' is always included
+    category / min_price / max_price / q: optional filters (q is full-text)
+    sort: one of listing.SORTS, default by id
+    Returns: (list of rows exposing the selected fields and updated_at as
+              attributes, cursor for the next page or None)
+    Raises ValueError for a malformed cursor, an unknown field or sort
+    """
+    limit = clamp_limit(limit, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    filters = {'category': category, 'min_price': min_price, 'max_price': max_price, 'q': q}
+
+    columns = listing.page_columns(fields)
+
+    with app.app_context():
+        # Seek past the last sort position instead of OFFSET so every page is an index range scan
+        return listing.list_products(columns, filters, sort, limit, cursor)
+
+
+@catalog_cached(catalog_cache, 'facets')
+def get_product_facets(category=None, min_price=None, max_price=None, q=None):
+    """
+    Category counts for a filtered listing (the category filter itself is
+    ignored so every category shows how many products it would offer)
+    Returns: list of {'name': category, 'count': n}
+    """
+    filters = {'category': category, 'min_price': min_price, 'max_price': max_price, 'q': q}
+    with app.app_context():
+        return listing.facet_counts(filters)
+
+
+def iter_products_page(limit=DEFAULT_PAGE_SIZE, cursor=None, fields=None):
+    """
+    Streaming variant of get_products_page for templates
+    Nothing is queried until the returned LazyPage is iterated; rows then
+    come from a server-side cursor in STREAM_BATCH_SIZE batches and
+    next_cursor is set once the page has been read
+    Iterate it inside the caller's app context (e.g. a streamed response) to
+    share its session
+    Raises ValueError for a malformed cursor or an unknown field
+    """
+    limit = clamp_limit(limit, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    after_id = decode_int_cursor(cursor, 'after') if cursor else 0
+    columns = [getattr(Product, f) for f in resolve_fields(fields)]
+
+    def load():
+        with _session_scope():
+            yield from db.session.execute(
+                db.select(*columns).where(Product.id > after_id).order_by(Product.id).limit(limit + 1),
+                execution_options={'yield_per': STREAM_BATCH_SIZE}
+            )
+
+    return LazyPage(load, limit, lambda row: encode_cursor({'after': row.id}))
+
+
+def get_popular_products(limit=DEFAULT_PAGE_SIZE, category=None, fields=None):
+    """
+    Most wishlisted products first, read live from the wishlist_count index
+    (counters change with every wishlist write, which does not bump the
+    catalog version, so this is not cached)
+    fields: optional list of columns to select, may include 'wishlist_count'
+    Returns: list of rows exposing the selected fields and updated_at
+    Raises ValueError for an unknown field
+    """
+    limit = clamp_limit(limit, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    columns = [getattr(Product, f) for f in resolve_fields(fields)] + [Product.updated_at]
+
+    with _session_scope():
+        query = db.select(*columns).where(Product.wishlist_count > 0)
+        if category:
+            query = query.where(Product.category == category)
+        query = query.order_by(Product.wishlist_count.desc(), Product.id.desc()).limit(limit)
+        return db.session.execute(query).all()
+
+
+@catalog_cached(catalog_cache, 'categories')
+def get_categories():
+    """
+    Every category with its product count and min/max price, by name
+    Read from the category summary table, never aggregated from products
+    """
+    with app.app_context():
+        return categories.list_category_stats()
+
+
+@catalog_cached(catalog_cache, 'product')
 def get_product_by_id(product_id):
     """Get a specific product by ID"""
     with app.app_context():
         return Product.query.get(product_id)
 
 
-def add_to_wishlist(user_id, product_id):
+def get_catalog_validator():
     """
-    Add a product to user's wishlist
-    Returns: WishlistItem if successful, None if already exists
+    Change marker for the whole catalog, without loading any products
+    Read from the shared catalog_state row on every call (never cached), so
+    all workers agree on it and deletions move it too; a revision written by
+    another process also invalidates this process's cached catalog reads
+    Returns: (time of the last product write, revision)
+    """
+    with _session_scope():
+        last_modified, revision = catalog_state.read_catalog_state()
+    sync_catalog_version(revision)
+    return last_modified, revision
+
+
+def get_product_validator(product_id):
+    """
+    Change marker for one product, without loading the row (never cached)
+    Returns: (True, updated_at) if the product exists, (False, None) otherwise
+    """
+    get_catalog_validator()
+    with _session_scope():
+        row = db.session.query(Product.updated_at).filter_by(id=product_id).first()
+        if row is None:
+            return False, None
+        return True, row.updated_at
+
+
+@catalog_cached(catalog_cache, 'search')
+def search_products(query, limit=search.DEFAULT_LIMIT, cursor=None):
+    """
+    Full-text search over product name, description and category
+    Returns: (list of Product objects ranked by relevance, next cursor or None)
+    Raises ValueError for a malformed cursor
     """
     with app.app_context():
-        # Check if already in wishlist
-        existing = WishlistItem.query.filter_by(
-            user_id=user_id,
-            product_id=product_id
-        ).first()
+        return search.search(query, limit=limit, cursor=cursor)
 
-        if existing:
-            print("Product already in wishlist")
-            return None
 
-        wishlist_item = WishlistItem(user_id=user_id, product_id=product_id)
-        db.session.add(wishlist_item)
-        db.session.commit()
+def get_catalog_cache_stats():
+    """Hit/miss/eviction counters of the catalog read cache"""
+    return catalog_cache.stats()
+
+
+def add_to_wishlist(user_id, product_id):
+    """
+    Add a product to user's wishlist
+    Returns: True if added, None if already in wishlist or product not found
+    """
+    status = add_to_wishlist_batch(user_id, [product_id])[product_id]
+    if status == 'added':
         print("Product added to wishlist!")
-        return wishlist_item
+        return True
+    print("Product already in wishlist" if status == 'exists' else "Product not found")
+    return None
 
 
 def remove_from_wishlist(user_id, product_id):
     """Remove a product from user's wishlist"""
-    with app.app_context():
-        wishlist_item = WishlistItem.query.filter_by(
-            user_id=user_id,
-            product_id=product_id
-        ).first()
+    status = remove_from_wishlist_batch(user_id, [product_id])[product_id]
+    if status == 'removed':
+        print("Product removed from wishlist!")
+        return True
+    print("Product not found in wishlist")
+    return False
 
-        if wishlist_item:
-            db.session.delete(wishlist_item)
-            db.session.commit()
-            print("Product removed from wishlist!")
-            return True
-        else:
-            print("Product not found in wishlist")
-            return False
+
+def add_to_wishlist_batch(user_id, product_ids):
+    """
+    Add several products to a user's wishlist in one transaction
+    Uses a single INSERT ... SELECT ... ON CONFLICT DO NOTHING, so concurrent
+    adds of the same product cannot trip the unique_user_product constraint;
+    wishlist_count is bumped for the rows actually inserted
+    Returns: dict of product_id -> 'added' | 'exists' | 'not_found'
+    """
+    product_ids = list(dict.fromkeys(product_ids))
+    if not product_ids:
+        return {}
+
+    with _session_scope():
+        # Selecting from products skips ids that do not exist
+        statement = sqlite_insert(WishlistItem).from_select(
+            ['user_id', 'product_id'],
+            db.select(db.literal(user_id), Product.id).where(Product.id.in_(product_ids))
+        ).on_conflict_do_nothing(
+            index_elements=['user_id', 'product_id']
+        ).returning(WishlistItem.product_id)
+        added = set(db.session.execute(statement).scalars())
+        popularity.adjust(added, +1)
+
+        # Tell "already saved" apart from "no such product" for the rest
+        remaining = [pid for pid in product_ids if pid not in added]
+        existing = set()
+        if remaining:
+            existing = set(db.session.execute(
+                db.select(Product.id).where(Product.id.in_(remaining))
+            ).scalars())
+
+        _commit()
+
+    return {
+        pid: 'added' if pid in added else 'exists' if pid in existing else 'not_found'
+        for pid in product_ids
+    }
+
+
+def remove_from_wishlist_batch(user_id, product_ids):
+    """
+    Remove several products from a user's wishlist with one DELETE ... IN (...)
+    and decrement wishlist_count for the rows actually deleted
+    Returns: dict of product_id -> 'removed' | 'not_found'
+    """
+    product_ids = list(dict.fromkeys(product_ids))
+    if not product_ids:
+        return {}
+
+    with _session_scope():
+        statement = db.delete(WishlistItem).where(
+            WishlistItem.user_id == user_id,
+            WishlistItem.product_id.in_(product_ids)
+        ).returning(WishlistItem.product_id)
+        removed = set(db.session.execute(statement).scalars())
+        popularity.adjust(removed, -1)
+        _commit()
+
+    return {pid: 'removed' if pid in removed else 'not_found' for pid in product_ids}
 
 
 def get_user_wishlist(user_id):
-    """Get all products in a user's wishlist"""
-    with app.app_context():
-        user = User.query.get(user_id)
-        if user:
-            return [item.product for item in user.wishlist_items]
-        return []
+    """Get all products in a user's wishlist, oldest saved first"""
+    products, _ = get_user_wishlist_page(user_id, limit=None)
+    return products
+
+
+def _decode_wishlist_cursor(cursor):
+    """Cursor -> (added_at, wishlist item id); raises ValueError if malformed"""
+    payload = decode_cursor(cursor)
+    try:
+        return datetime.fromisoformat(payload['at']), int(payload['id'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('Invalid cursor')
+
+
+def get_user_wishlist_page(user_id, limit=None, cursor=None):
+    """
+    Get products in a user's wishlist ordered by when they were saved
+    Products come back from one joined query, never one query per item
+    limit: page size (capped at MAX_WISHLIST_PAGE_SIZE), None for everything
+    Returns: (list of Product objects, next cursor or None)
+    Raises ValueError for a malformed cursor
+    """
+    if limit is not None:
+        limit = clamp_limit(limit, MAX_WISHLIST_PAGE_SIZE, MAX_WISHLIST_PAGE_SIZE)
+
+    with _session_scope():
+        query = db.session.query(Product, WishlistItem.added_at, WishlistItem.id).join(
+            WishlistItem, WishlistItem.product_id == Product.id
+        ).filter(WishlistItem.user_id == user_id)
+
+        if cursor:
+            added_at, item_id = _decode_wishlist_cursor(cursor)
+            query = query.filter(db.or_(
+                WishlistItem.added_at > added_at,
+                db.and_(WishlistItem.added_at == added_at, WishlistItem.id > item_id)
+            ))
+
+        query = query.order_by(WishlistItem.added_at, WishlistItem.id)
+        if limit is not None:
+            query = query.limit(limit + 1)
+        rows = query.all()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        _, added_at, item_id = rows[-1]
+        next_cursor = encode_cursor({'at': added_at.isoformat(), 'id': item_id})
+
+    return [product for product, _, _ in rows], next_cursor
+
+
+def iter_user_wishlist(user_id):
+    """
+    Yield the products in a user's wishlist, oldest saved first, reading
+    them through a server-side cursor instead of loading the whole list
+    Iterate it inside the caller's app context (e.g. a streamed response) to
+    share its session
+    """
+    with _session_scope():
+        result = db.session.execute(
+            db.select(Product).join(
+                WishlistItem, WishlistItem.product_id == Product.id
+            ).where(WishlistItem.user_id == user_id).order_by(WishlistItem.added_at, WishlistItem.id),
+            execution_options={'yield_per': STREAM_BATCH_SIZE}
+        )
+        yield from result.scalars()
 
 
 def list_all_users():
     """List all users (for debugging)"""
-    with app.app_context():
+    with _session_scope():
         users = User.query.all()
         print(f"\n=== Total Users: {len(users)} ===")
         for user in users:
@@ -153,7 +522,7 @@ def list_all_users():
 
 def list_all_products():
     """List all products (for debugging)"""
-    with app.app_context():
+    with _session_scope():
         products = Product.query.all()
         print(f"\n=== Total Products: {len(products)} ===")
         for product in products:
@@ -166,7 +535,11 @@ def add_product(name, description, price, image_url, external_link=None, categor
     Add a new product to the database
     Returns: Product object if successful, None if product already exists
     """
-    with app.app_context():
+    with _session_scope():
+        search.ensure_search_index()
+        categories.ensure_category_stats()
+        catalog_state.ensure_catalog_state()
+
         # Check if product already exists
         existing = Product.query.filter_by(name=name).first()
         if existing:
@@ -183,7 +556,12 @@ def add_product(name, description, price, image_url, external_link=None, categor
         )
 
         db.session.add(product)
-        db.session.commit()
+        db.session.flush()
+        search.index_products([product])
+        categories.record_added([(product.category, product.price)])
+        catalog_state.record_change()
+        _commit()
+        _after_commit(bump_catalog_version)
         print(f"Product '{name}' added successfully! (ID: {product.id})")
         return product
 
@@ -191,26 +569,19 @@ def add_product(name, description, price, image_url, external_link=None, categor
 def add_products_bulk(products_list):
     """
     Add multiple products at once
-    products_list: List of dictionaries with product data
+    products_list: any iterable of dictionaries with product data
     Returns: Number of products added
+    For large feeds use backend.importer / scripts/import_products.py directly
+    Inside unit_of_work() the rows are part of its transaction
     """
-    with app.app_context():
-        added = 0
-        for product_data in products_list:
-            # Check if product already exists
-            existing = Product.query.filter_by(name=product_data['name']).first()
-            if existing:
-                print(f"Skipping '{product_data['name']}' - already exists")
-                continue
-
-            product = Product(**product_data)
-            db.session.add(product)
-            added += 1
-            print(f"Added: {product_data['name']}")
-
-        db.session.commit()
-        print(f"\n{added} new products added to database!")
-        return added
+    if _in_unit_of_work():
+        stats = importer.import_products(products_list, progress=False, in_transaction=True)
+        _after_commit(bump_catalog_version)
+    else:
+        stats = importer.import_products(products_list, progress=False)
+    print(f"{stats['inserted']} new products added to database! "
+          f"({stats['skipped']} already existed, {stats['invalid']} invalid)")
+    return stats['inserted']
 
 
 def update_product(product_id, **kwargs):
@@ -218,33 +589,53 @@ def update_product(product_id, **kwargs):
     Update a product's fields
     Usage: update_product(1, price=699.00, description="New description")
     """
-    with app.app_context():
+    with _session_scope():
+        search.ensure_search_index()
+        categories.ensure_category_stats()
+        catalog_state.ensure_catalog_state()
+
         product = Product.query.get(product_id)
         if not product:
             print(f"Error: Product with ID {product_id} not found")
             return None
 
+        before = (product.category, product.price)
         for key, value in kwargs.items():
             if hasattr(product, key):
                 setattr(product, key, value)
                 print(f"Updated {key}: {value}")
 
-        db.session.commit()
+        db.session.flush()
+        search.index_products([product])
+        categories.record_changed(before, (product.category, product.price))
+        catalog_state.record_change()
+        _commit()
+        _after_commit(bump_catalog_version)
         print(f"Product '{product.name}' updated successfully!")
         return product
 
 
 def delete_product(product_id):
     """Delete a product from the database"""
-    with app.app_context():
+    with _session_scope():
+        search.ensure_search_index()
+        categories.ensure_category_stats()
+        catalog_state.ensure_catalog_state()
+
         product = Product.query.get(product_id)
         if not product:
             print(f"Error: Product with ID {product_id} not found")
             return False
 
         name = product.name
+        removed = (product.category, product.price)
         db.session.delete(product)
-        db.session.commit()
+        db.session.flush()
+        search.unindex_product(product_id)
+        categories.record_removed([removed])
+        catalog_state.record_change()
+        _commit()
+        _after_commit(bump_catalog_version)
         print(f"Product '{name}' deleted successfully!")
         return True
 
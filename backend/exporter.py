@@ -0,0 +1,119 @@
+"""
+Streaming product export to CSV or JSONL
+Rows are read through a server-side cursor in batches and encoded as they
+arrive, so memory stays flat and the first bytes are ready before the
+query has finished
+"""
+
+import csv
+import io
+import json
+import sys
+import zlib
+
+from app import app, db
+from backend.models import Product
+
+
+EXPORT_FIELDS = ('id', 'name', 'description', 'price', 'category', 'image_url', 'external_link')
+FORMATS = ('csv', 'jsonl')
+MIMETYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def iter_product_rows(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Yield every product as a tuple of EXPORT_FIELDS, in id order
+    Opens its own app context so it can be consumed by a streamed response
+    """
+    columns = [getattr(Product, field) for field in EXPORT_FIELDS]
+
+    with app.app_context():
+        result = db.session.execute(
+            db.select(*columns).order_by(Product.id),
+            execution_options={'yield_per': batch_size}
+        )
+        for partition in result.partitions():
+            yield from partition
+
+
+def iter_csv(rows, batch_size=DEFAULT_BATCH_SIZE):
+    """Encode rows as CSV, yielding one bytes chunk per batch_size rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    yield buffer.getvalue().encode('utf-8')
+
+
+def iter_jsonl(rows, batch_size=DEFAULT_BATCH_SIZE):
+    """Encode rows as JSON lines, yielding one bytes chunk per batch_size rows"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False, separators=(',', ':')))
+        if len(lines) >= batch_size:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+            lines = []
+
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress a stream of bytes chunks into a gzip stream on the fly"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(file_format='csv', compress=False, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Iterator of encoded bytes for the whole catalog
+    Raises ValueError for an unsupported format
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported format: {file_format}")
+
+    encoder = iter_csv if file_format == 'csv' else iter_jsonl
+    chunks = encoder(iter_product_rows(batch_size), batch_size)
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def export_to_file(path, file_format='csv', compress=False, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Stream the catalog into a file, or to stdout when path is '-'
+    Returns: number of bytes written
+    """
+    chunks = export_chunks(file_format, compress, batch_size)
+    written = 0
+
+    if path == '-':
+        out = sys.stdout.buffer
+        for chunk in chunks:
+            out.write(chunk)
+            written += len(chunk)
+        out.flush()
+        return written
+
+    with open(path, 'wb') as out:
+        for chunk in chunks:
+            out.write(chunk)
+            written += len(chunk)
+    return written
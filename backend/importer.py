@@ -0,0 +1,205 @@
+"""
+Streaming product importer for CSV and JSONL feeds
+Rows are processed in fixed-size chunks: one name lookup per chunk for
+de-duplication, one executemany INSERT, one commit, so memory stays bounded
+by the chunk size whatever the feed size
+"""
+
+import csv
+import io
+import json
+import sys
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from itertools import islice
+
+from app import app, db
+from backend.models import Product
+from backend import search, categories, catalog_state
+from backend.cache import bump_catalog_version
+
+
+DEFAULT_CHUNK_SIZE = 5000
+# Each chunk's name lookup binds one parameter per row (SQLite allows 32766)
+MAX_CHUNK_SIZE = 30000
+
+# Columns accepted from a feed; anything else (e.g. an exported id) is ignored
+IMPORT_FIELDS = ('name', 'description', 'price', 'image_url', 'external_link', 'category')
+# Optional (datetime or ISO 8601); missing ones default to the time of the import
+TIMESTAMP_FIELDS = ('created_at', 'updated_at')
+
+# Line numbers of malformed JSONL lines kept in the stats (all are counted)
+MAX_REPORTED_LINES = 100
+
+
+class MalformedLine:
+    """Stands in for a JSONL line that is not valid JSON; counted as invalid"""
+
+    __slots__ = ('line_number',)
+
+    def __init__(self, line_number):
+        self.line_number = line_number
+
+
+def read_csv(stream):
+    """Yield one dict per CSV row (the first line must be a header)"""
+    yield from csv.DictReader(stream)
+
+
+def read_jsonl(stream):
+    """Yield one dict per non-blank JSON line, or a MalformedLine if it does not parse"""
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield MalformedLine(line_number)
+
+
+READERS = {
+    'csv': read_csv,
+    'jsonl': read_jsonl,
+}
+
+
+def _clean_row(raw, now):
+    """
+    Keep only importable columns and coerce types
+    Returns: dict ready for insert, or None if the row is unusable
+    """
+    if not isinstance(raw, dict):
+        return None
+
+    row = {}
+    for field in IMPORT_FIELDS:
+        value = raw.get(field)
+        if isinstance(value, str):
+            value = value.strip() or None
+        row[field] = value
+
+    if not row['name'] or not row['description'] or row['price'] is None:
+        return None
+    try:
+        row['price'] = float(row['price'])
+    except (TypeError, ValueError):
+        return None
+
+    for field in TIMESTAMP_FIELDS:
+        value = raw.get(field)
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value.strip()) if value.strip() else None
+            except ValueError:
+                return None
+        if value is not None and not isinstance(value, datetime):
+            return None
+        row[field] = value
+    # Every row carries both, so the chunk stays one executemany
+    row['created_at'] = row['created_at'] or now
+    row['updated_at'] = row['updated_at'] or row['created_at']
+    return row
+
+
+def _import_chunk(raw_rows, stats, commit=True):
+    """De-duplicate, insert, index and count one chunk in a single transaction (only flushed unless commit)"""
+    rows = []
+    names = set()
+    now = datetime.utcnow()
+    for raw in raw_rows:
+        row = _clean_row(raw, now)
+        if row is None:
+            stats['invalid'] += 1
+            if isinstance(raw, MalformedLine) and len(stats['malformed_lines']) < MAX_REPORTED_LINES:
+                stats['malformed_lines'].append(raw.line_number)
+        elif row['name'] in names:
+            stats['skipped'] += 1
+        else:
+            names.add(row['name'])
+            rows.append(row)
+
+    if not rows:
+        return
+
+    # One set-based lookup for the whole chunk instead of a query per row
+    existing = set(db.session.execute(
+        db.select(Product.name).where(Product.name.in_(names))
+    ).scalars())
+    rows = [row for row in rows if row['name'] not in existing]
+    stats['skipped'] += len(existing)
+
+    if rows:
+        inserted_ids = db.session.execute(
+            db.insert(Product).returning(Product.id), rows
+        ).scalars().all()
+        search.index_product_ids(inserted_ids)
+        categories.record_added((row['category'], row['price']) for row in rows)
+        stats['inserted'] += len(inserted_ids)
+        catalog_state.record_change()
+
+    if commit:
+        db.session.commit()
+    else:
+        db.session.flush()
+
+
+def import_products(rows, chunk_size=DEFAULT_CHUNK_SIZE, progress=True, in_transaction=False):
+    """
+    Import an iterable of product dicts, committing every chunk_size rows
+    Products whose name already exists are skipped
+    With in_transaction the import joins the caller's app context and
+    transaction instead: chunks are only flushed, and committing (or rolling
+    back) and bump_catalog_version() are left to the caller
+    Returns: dict with read/inserted/skipped/invalid counts, elapsed seconds
+    and the first MAX_REPORTED_LINES line numbers of malformed JSONL lines
+    """
+    stats = {'read': 0, 'inserted': 0, 'skipped': 0, 'invalid': 0, 'seconds': 0.0,
+             'malformed_lines': []}
+    chunk_size = max(1, min(chunk_size, MAX_CHUNK_SIZE))
+    rows = iter(rows)
+    started = time.perf_counter()
+
+    with nullcontext() if in_transaction else app.app_context():
+        search.ensure_search_index()
+        categories.ensure_category_stats()
+        catalog_state.ensure_catalog_state()
+
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            stats['read'] += len(chunk)
+            _import_chunk(chunk, stats, commit=not in_transaction)
+            if not in_transaction:
+                bump_catalog_version()
+
+            if progress:
+                elapsed = time.perf_counter() - started
+                rate = stats['read'] / elapsed if elapsed else 0
+                print(f"{stats['read']:,} rows read | {stats['inserted']:,} inserted | "
+                      f"{stats['skipped']:,} skipped | {stats['invalid']:,} invalid | "
+                      f"{rate:,.0f} rows/s")
+
+    stats['seconds'] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def import_file(path, file_format=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=True):
+    """
+    Stream a CSV or JSONL file (or '-' for stdin) into the products table
+    file_format defaults to the file extension
+    """
+    if file_format is None:
+        file_format = 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv'
+    if file_format not in READERS:
+        raise ValueError(f"Unsupported format: {file_format}")
+
+    reader = READERS[file_format]
+    if path == '-':
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+        return import_products(reader(stream), chunk_size=chunk_size, progress=progress)
+
+    with open(path, newline='', encoding='utf-8') as stream:
+        return import_products(reader(stream), chunk_size=chunk_size, progress=progress)
@@ -0,0 +1,242 @@
+"""
+Faceted product listing: server-side filters, sorts and facet counts
+Each sort is a keyset over (sort column, id) and each filter/sort pair is
+served by one of the products indexes ((category), (category, price),
+(category, created_at), (category, wishlist_count) and their
+single-column counterparts), so a page is an index range scan
+rather than a sort of the whole table. explain() returns the SQLite query
+plan of any combination; scripts/check_query_plans.py checks them all
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Integer, func, text, tuple_
+
+from app import db
+from backend.models import Product
+from backend import search, categories
+from backend.pagination import encode_cursor, decode_cursor, decode_int_cursor
+from backend.serializers import resolve_fields
+
+
+FILTERS = ('category', 'min_price', 'max_price', 'q')
+
+
+# sort name -> (column or expression, descending)
+SORTS = {
+    'id': (Product.id, False),
+    'price': (Product.price, False),
+    '-price': (Product.price, True),
+    'newest': (Product.created_at, True),
+    'popularity': (Product.wishlist_count, True),
+}
+DEFAULT_SORT = 'id'
+
+
+def parse_filters(args):
+    """
+    Pick the listing filters out of a mapping (e.g. request.args)
+    Returns: dict with a value (or None) for every name in FILTERS
+    Raises ValueError for a malformed price or an inverted price range
+    """
+    filters = {}
+    for name in ('category', 'q'):
+        value = (args.get(name) or '').strip()
+        filters[name] = value or None
+
+    for name in ('min_price', 'max_price'):
+        value = args.get(name)
+        if value in (None, ''):
+            filters[name] = None
+            continue
+        try:
+            filters[name] = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid {name}")
+
+    if (filters['min_price'] is not None and filters['max_price'] is not None
+            and filters['min_price'] > filters['max_price']):
+        raise ValueError('min_price is greater than max_price')
+    return filters
+
+
+def _where(filters, include_category=True):
+    """SQL conditions for a filters dict"""
+    clauses = []
+    if include_category and filters.get('category'):
+        clauses.append(Product.category == filters['category'])
+    if filters.get('min_price') is not None:
+        clauses.append(Product.price >= filters['min_price'])
+    if filters.get('max_price') is not None:
+        clauses.append(Product.price <= filters['max_price'])
+    if filters.get('q'):
+        match = search.build_match_query(filters['q'])
+        if match is not None:
+            search.ensure_search_index()
+            clauses.append(Product.id.in_(
+                text(f"SELECT rowid FROM {search.FTS_TABLE} WHERE {search.FTS_TABLE} MATCH :match")
+                .bindparams(match=match)
+                .columns(rowid=Integer)
+            ))
+    return clauses
+
+
+def _sort_key(sort):
+    if sort not in SORTS:
+        raise ValueError(f"Unknown sort: {sort} (use one of {', '.join(SORTS)})")
+    return SORTS[sort]
+
+
+def _decode_sort_cursor(cursor, sort):
+    """Cursor -> (sort value, id) for a non-id sort; raises ValueError if malformed"""
+    payload = decode_cursor(cursor)
+    if payload.get('s') != sort:
+        raise ValueError('Invalid cursor')
+    value, last_id = payload.get('v'), payload.get('id')
+    if not isinstance(last_id, int) or value is None:
+        raise ValueError('Invalid cursor')
+    if sort == 'newest':
+        try:
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValueError('Invalid cursor')
+    return value, last_id
+
+
+def page_columns(fields=None):
+    """
+    Columns a listing page selects: the requested public fields plus
+    updated_at, which keys the encoded-JSON cache in backend/serializers.py
+    Raises ValueError for an unknown field
+    """
+    return [getattr(Product, f) for f in resolve_fields(fields)] + [Product.updated_at]
+
+
+def build_query(columns, filters, sort=DEFAULT_SORT, limit=None, cursor=None):
+    """
+    SELECT of columns for one page of the filtered, sorted listing
+    A non-id sort also selects its sort value as 'sort_value' so the next
+    cursor can be built from the last row
+    Raises ValueError for an unknown sort or a malformed cursor
+    """
+    key, descending = _sort_key(sort)
+    if sort != 'id':
+        columns = list(columns) + [key.label('sort_value')]
+
+    query = db.select(*columns).where(*_where(filters))
+
+    if cursor:
+        if sort == 'id':
+            query = query.where(Product.id > decode_int_cursor(cursor, 'after'))
+        else:
+            value, last_id = _decode_sort_cursor(cursor, sort)
+            position = tuple_(key, Product.id)
+            query = query.where(position < (value, last_id) if descending else position > (value, last_id))
+
+    if descending:
+        query = query.order_by(key.desc(), Product.id.desc())
+    else:
+        query = query.order_by(key, Product.id)
+
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def next_cursor_for(row, sort):
+    """Cursor continuing after row, the last row of a page"""
+    if sort == 'id':
+        return encode_cursor({'after': row.id})
+    value = row.sort_value
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return encode_cursor({'s': sort, 'v': value, 'id': row.id})
+
+
+def list_products(columns, filters, sort=DEFAULT_SORT, limit=24, cursor=None):
+    """
+    One page of the listing; must be called inside an app context
+    Returns: (rows, cursor for the next page or None)
+    Raises ValueError for an unknown sort or a malformed cursor
+    """
+    rows = db.session.execute(build_query(columns, filters, sort, limit + 1, cursor)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = next_cursor_for(rows[-1], sort)
+    return rows, next_cursor
+
+
+def has_filters(filters, include_category=True):
+    """True if any filter is set"""
+    return any(
+        filters.get(name) not in (None, '')
+        for name in FILTERS if include_category or name != 'category'
+    )
+
+
+def facet_query(filters):
+    """Per-category counts over the listing with every filter but category applied"""
+    return db.select(Product.category, func.count(Product.id)).where(
+        Product.category.is_not(None), *_where(filters, include_category=False)
+    ).group_by(Product.category).order_by(Product.category)
+
+
+def facet_counts(filters):
+    """
+    Category facet for the current result set: how many matching products
+    each category would have if it were picked; must be called inside an
+    app context
+    Returns: list of {'name': category, 'count': n}
+    """
+    if not has_filters(filters, include_category=False):
+        # Unfiltered: the category summary table already has the answer
+        return [
+            {'name': c['name'], 'count': c['product_count']}
+            for c in categories.list_category_stats()
+        ]
+    return [
+        {'name': category, 'count': count}
+        for category, count in db.session.execute(facet_query(filters))
+    ]
+
+
+def explain(query):
+    """
+    SQLite's query plan for a statement built by build_query()/facet_query()
+    Returns: list of plan detail strings, e.g. 'SEARCH products USING INDEX ...'
+    """
+    sql = query.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    rows = db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")
+    return [row[3] for row in rows]
+
+
+def is_table_scan(plan, rowid_order=False):
+    """
+    True if a plan reads the whole products table without an index
+    rowid_order: the query is unfiltered and sorted by id, where walking
+    the table in rowid order (its own primary key b-tree) until LIMIT is fine
+    """
+    scans = [step for step in plan if step.strip() == 'SCAN products']
+    if not scans:
+        return False
+    return not rowid_order or uses_temp_sort(plan)
+
+
+def uses_temp_sort(plan):
+    """True if a plan sorts rows in a temporary b-tree instead of reading them in index order"""
+    return any('USE TEMP B-TREE' in step for step in plan)
+
+
+def sort_needs_temp_btree(filters, sort=None):
+    """
+    True when no index can both filter and order the listing, so sorting the
+    matching rows is expected: a text filter (FTS returns an unordered set),
+    or a price range under any other sort than price. sort=None stands for
+    the facet query, which is only run with one of those filters
+    """
+    if filters.get('q'):
+        return True
+    price_range = filters.get('min_price') is not None or filters.get('max_price') is not None
+    return price_range and sort not in ('price', '-price')
@@ -0,0 +1,445 @@
+"""
+HTTP load-test harness
+Drives a running server with virtual users, each a thread holding one
+keep-alive connection and its own session cookie, that loop over weighted
+scenarios until the run ends:
+  browse    home page, listing pages (filters, sorts, a next page), a product,
+            categories and search
+  login     a login with fresh credentials every time (password hashing storm)
+  wishlist  log in once, then add, list and remove wishlist items
+Latencies are recorded per route, so results give requests/sec and
+p50/p95/p99 for each endpoint. local_server() and ensure_dataset() boot
+scripts/serve.py against a generated dataset (see scripts/load_test.py)
+Only the standard library is used, so the client adds no dependencies
+"""
+
+import gzip
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'instance', 'benchmarks')
+DATASET_DIR = os.path.join(RESULTS_DIR, 'datasets')
+
+# name -> (products, users, wishlist items), see scripts/generate_dataset.py
+DATASETS = {
+    'small': (10000, 1000, 50000),
+    'medium': (100000, 10000, 500000),
+    'large': (1000000, 100000, 5000000),
+}
+# Part of the cached file names; bump when backend/datagen.py starts making
+# different data for the same seed, so old datasets are not reused
+DATASET_FORMAT = 2
+
+# name -> {scenario: weight}
+WORKLOADS = {
+    'browse': {'browse': 1},
+    'login': {'login': 1},
+    'wishlist': {'wishlist': 1},
+    'mixed': {'browse': 75, 'wishlist': 20, 'login': 5},
+}
+
+CATEGORIES = ('Audio', 'Laptops', 'PC Components', 'Smartphones', 'Tablets', 'Wearables')
+SEARCH_TERMS = ('sony', 'pro', 'laptop', 'oled', 'noise cancelling', 'samsung tablet', 'wi-fi')
+LISTING_SORTS = ('id', 'price', '-price', 'newest', 'popularity')
+
+DEFAULT_PASSWORD = 'password123'
+PERCENTILES = (50, 95, 99)
+
+
+class Recorder:
+    """Latencies (ms) and status counts per route for one virtual user"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+        self.active = False
+
+    def record(self, route, status, milliseconds):
+        if not self.active:
+            return
+        self.latencies.setdefault(route, []).append(milliseconds)
+        self.statuses.setdefault(route, Counter())[str(status)] += 1
+
+
+class Client:
+    """One keep-alive HTTP connection with a cookie jar"""
+
+    def __init__(self, base_url, recorder, timeout=30):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self.recorder = recorder
+        self.cookies = {}
+        self.connection = None
+
+    def _connect(self):
+        self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method, path, route, payload=None):
+        """
+        Send one request and record its latency under route
+        Returns: (status, decoded JSON body or None); status is 'error' when
+        the connection failed
+        """
+        headers = {'Accept-Encoding': 'gzip'}
+        body = None
+        if payload is not None:
+            body = json.dumps(payload)
+            headers['Content-Type'] = 'application/json'
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f"{name}={value}" for name, value in self.cookies.items())
+
+        if self.connection is None:
+            self._connect()
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self.recorder.record(route, 'error', (time.perf_counter() - started) * 1000)
+            self.connection.close()
+            self.connection = None
+            return 'error', None
+        self.recorder.record(route, response.status, (time.perf_counter() - started) * 1000)
+
+        for header in response.headers.get_all('Set-Cookie') or ():
+            name, _, value = header.split(';', 1)[0].partition('=')
+            self.cookies[name.strip()] = value.strip()
+
+        if response.getheader('Content-Type', '').startswith('application/json'):
+            if response.getheader('Content-Encoding') == 'gzip':
+                data = gzip.decompress(data)
+            try:
+                return response.status, json.loads(data)
+            except ValueError:
+                pass
+        return response.status, None
+
+    def get(self, path, route):
+        return self.request('GET', path, route)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+
+def username(number):
+    """Username of the number-th generated user (see backend/datagen.py)"""
+    return f"user{number:07d}"
+
+
+class VirtualUser:
+    """State of one simulated visitor"""
+
+    def __init__(self, client, rng, products, users, password):
+        self.client = client
+        self.rng = rng
+        self.products = products
+        self.users = users
+        self.password = password
+        self.logged_in = False
+        self.wishlist = []
+
+    def product_id(self):
+        """Product id with a Zipf-like skew towards low ids, like real traffic"""
+        return max(1, int(self.products ** self.rng.random()))
+
+    def browse(self):
+        client, rng = self.client, self.rng
+        client.get('/', 'GET /')
+
+        params = {'limit': 24}
+        if rng.random() < 0.5:
+            params['category'] = rng.choice(CATEGORIES)
+        if rng.random() < 0.5:
+            params['sort'] = rng.choice(LISTING_SORTS)
+        status, page = client.get(f"/api/products?{urlencode(params)}", 'GET /api/products')
+        if status == 200 and page and page.get('next_cursor') and rng.random() < 0.5:
+            params['cursor'] = page['next_cursor']
+            client.get(f"/api/products?{urlencode(params)}", 'GET /api/products')
+
+        client.get(f"/api/products/{self.product_id()}", 'GET /api/products/<id>')
+
+        if rng.random() < 0.3:
+            client.get('/api/categories', 'GET /api/categories')
+        if rng.random() < 0.3:
+            query = urlencode({'q': rng.choice(SEARCH_TERMS)})
+            client.get(f"/api/products/search?{query}", 'GET /api/products/search')
+
+    def login(self):
+        number = self.rng.randint(1, self.users)
+        status, _ = self.client.request('POST', '/api/login', 'POST /api/login', {
+            'username': username(number), 'password': self.password
+        })
+        return status == 200
+
+    def wishlist_churn(self):
+        client, rng = self.client, self.rng
+        if not self.logged_in:
+            self.logged_in = self.login()
+            if not self.logged_in:
+                return
+
+        product_id = self.product_id()
+        status, _ = client.request('POST', '/api/wishlist', 'POST /api/wishlist', {'product_id': product_id})
+        if status == 201:
+            self.wishlist.append(product_id)
+
+        client.get('/api/wishlist?limit=50', 'GET /api/wishlist')
+
+        # Remove as much as is added so the dataset does not drift between runs
+        if self.wishlist and (rng.random() < 0.5 or len(self.wishlist) > 20):
+            product_id = self.wishlist.pop(rng.randrange(len(self.wishlist)))
+            client.request('DELETE', '/api/wishlist', 'DELETE /api/wishlist', {'product_id': product_id})
+
+    def cleanup(self):
+        """Take this user's additions back out (not recorded)"""
+        for product_id in self.wishlist:
+            self.client.request('DELETE', '/api/wishlist', 'DELETE /api/wishlist', {'product_id': product_id})
+        self.wishlist = []
+
+    def run_scenario(self, name):
+        if name == 'browse':
+            self.browse()
+        elif name == 'login':
+            # A fresh session for every login
+            self.client.cookies.clear()
+            self.logged_in = False
+            self.login()
+        elif name == 'wishlist':
+            self.wishlist_churn()
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return None
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(latencies, statuses, seconds):
+    """Stats of one route (or of all routes together)"""
+    ordered = sorted(latencies)
+    errors = sum(n for status, n in statuses.items() if status == 'error' or status.startswith('5'))
+    stats = {
+        'requests': len(ordered),
+        'rps': round(len(ordered) / seconds, 1) if seconds else 0.0,
+        'errors': errors,
+        'statuses': dict(sorted(statuses.items())),
+        'mean_ms': round(sum(ordered) / len(ordered), 2) if ordered else None,
+        'max_ms': round(ordered[-1], 2) if ordered else None,
+    }
+    for pct in PERCENTILES:
+        value = percentile(ordered, pct)
+        stats[f"p{pct}_ms"] = round(value, 2) if value is not None else None
+    return stats
+
+
+def run(base_url, workload='mixed', concurrency=16, duration=30, warmup=5,
+        products=DATASETS['small'][0], users=DATASETS['small'][1],
+        password=DEFAULT_PASSWORD, seed=42):
+    """
+    Drive base_url with concurrency virtual users for warmup + duration seconds
+    Only requests finished after the warm-up are recorded
+    Returns: dict with 'routes' (per-route stats) and 'total'
+    """
+    if workload not in WORKLOADS:
+        raise ValueError(f"Unknown workload: {workload} (use one of {', '.join(WORKLOADS)})")
+    scenarios = list(WORKLOADS[workload])
+    weights = list(WORKLOADS[workload].values())
+
+    recorders = [Recorder() for _ in range(concurrency)]
+    stop = threading.Event()
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        client = Client(base_url, recorders[index])
+        user = VirtualUser(client, rng, products, users, password)
+        try:
+            while not stop.is_set():
+                user.run_scenario(rng.choices(scenarios, weights)[0])
+            recorders[index].active = False
+            user.cleanup()
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+
+    time.sleep(warmup)
+    for recorder in recorders:
+        recorder.active = True
+    started = time.perf_counter()
+    time.sleep(duration)
+    for recorder in recorders:
+        recorder.active = False
+    seconds = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies, statuses = {}, {}
+    for recorder in recorders:
+        for route, values in recorder.latencies.items():
+            latencies.setdefault(route, []).extend(values)
+        for route, counts in recorder.statuses.items():
+            statuses.setdefault(route, Counter()).update(counts)
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    all_statuses = sum(statuses.values(), Counter())
+    return {
+        'seconds': round(seconds, 2),
+        'routes': {
+            route: summarize(latencies[route], statuses[route], seconds)
+            for route in sorted(latencies)
+        },
+        'total': summarize(all_latencies, all_statuses, seconds),
+    }
+
+
+def git_commit():
+    """Short hash of the checked-out commit, or None outside a git checkout"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def timestamp():
+    return datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def save_results(results, path=None):
+    """Write results as JSON (default: instance/benchmarks/http-<workload>-<commit>-<time>.json)"""
+    if path is None:
+        meta = results['meta']
+        name = f"http-{meta['workload']}-{meta['commit'] or 'nogit'}-{meta['started']}.json"
+        path = os.path.join(RESULTS_DIR, name)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as handle:
+        json.dump(results, handle, indent=2)
+    return path
+
+
+def compare(baseline, current):
+    """
+    Per-route change between two result files' dicts
+    Returns: list of (route, baseline rps, rps, baseline p95, p95, p95 change %)
+    """
+    rows = []
+    for route in sorted(set(baseline['routes']) | set(current['routes'])):
+        before = baseline['routes'].get(route, {})
+        after = current['routes'].get(route, {})
+        change = None
+        if before.get('p95_ms') and after.get('p95_ms') is not None:
+            change = round((after['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100, 1)
+        rows.append((route, before.get('rps'), after.get('rps'), before.get('p95_ms'), after.get('p95_ms'), change))
+    return rows
+
+
+def ensure_dataset(name, seed=42, progress=True):
+    """
+    Path of the generated dataset name (see DATASETS), generating it on first use
+    Datasets are kept under instance/benchmarks/datasets and reused by later runs
+    """
+    products, users, wishlists = DATASETS[name]
+    path = os.path.join(DATASET_DIR, f"{name}-seed{seed}-v{DATASET_FORMAT}.db")
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(DATASET_DIR, exist_ok=True)
+    if progress:
+        print(f"→ Generating the {name} dataset ({products:,} products), this runs once...")
+    partial = path + '.partial'
+    subprocess.run([
+        sys.executable, os.path.join(ROOT, 'scripts', 'generate_dataset.py'),
+        '--products', str(products), '--users', str(users), '--wishlists', str(wishlists),
+        '--seed', str(seed), '--reset', '--quiet'
+    ], env={**os.environ, 'TECHFINDER_DB': partial}, check=True,
+        stdout=None if progress else subprocess.DEVNULL)
+
+    # Fold the WAL into the file so the dataset is a single file
+    import sqlite3
+    connection = sqlite3.connect(partial)
+    connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    connection.close()
+    os.replace(partial, path)
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(partial + suffix):
+            os.remove(partial + suffix)
+    return path
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(base_url, process, timeout):
+    deadline = time.monotonic() + timeout
+    parts = urlsplit(base_url)
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=2)
+            connection.request('GET', '/api/auth/status')
+            if connection.getresponse().status == 200:
+                connection.close()
+                return
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"Server did not answer within {timeout}s")
+
+
+@contextmanager
+def local_server(database, workers=None, threads=None, log_path=None, timeout=120):
+    """
+    Run scripts/serve.py on a free local port against database
+    Yields the base URL; the server is shut down gracefully afterwards
+    """
+    port = _free_port()
+    command = [sys.executable, os.path.join(ROOT, 'scripts', 'serve.py'),
+               '--bind', f"127.0.0.1:{port}", '--max-requests', '0']
+    if workers:
+        command += ['--workers', str(workers)]
+    if threads:
+        command += ['--threads', str(threads)]
+
+    log = open(log_path, 'w') if log_path else subprocess.DEVNULL
+    process = subprocess.Popen(command, env={**os.environ, 'TECHFINDER_DB': database},
+                               stdout=log, stderr=subprocess.STDOUT)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_until_up(base_url, process, timeout)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        if log_path:
+            log.close()
@@ -0,0 +1,278 @@
+"""
+Per-route request metrics in Prometheus text format
+Request hooks and SQLAlchemy cursor listeners record, for every route:
+request counts by status, a latency histogram, a response size histogram,
+SQL statement counts and the time spent in them. Each thread records into
+its own ThreadStats without taking a lock; /metrics adds the threads up
+when it is scraped.
+A request is timed until its body has been sent, so streamed pages count
+their streaming time and the queries made while streaming. Metrics are
+per process: under scripts/serve.py every series carries the worker's pid
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from flask import request
+from sqlalchemy import event
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)  # bytes
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)  # statements per request
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+class RouteStats:
+    """Everything recorded for one (route, method) on one thread"""
+
+    __slots__ = ('statuses', 'latency', 'latency_sum', 'size', 'size_sum',
+                 'queries', 'query_count', 'query_seconds', 'count')
+
+    def __init__(self):
+        self.statuses = {}
+        self.latency = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.size = [0] * (len(SIZE_BUCKETS) + 1)
+        self.size_sum = 0
+        self.queries = [0] * (len(QUERY_BUCKETS) + 1)
+        self.query_count = 0
+        self.query_seconds = 0.0
+        self.count = 0
+
+    def merge(self, other):
+        for status, n in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + n
+        for buckets, more in ((self.latency, other.latency), (self.size, other.size),
+                              (self.queries, other.queries)):
+            for i, n in enumerate(more):
+                buckets[i] += n
+        self.latency_sum += other.latency_sum
+        self.size_sum += other.size_sum
+        self.query_count += other.query_count
+        self.query_seconds += other.query_seconds
+        self.count += other.count
+
+
+class ThreadStats:
+    """Per-thread (route, method) -> RouteStats; only its own thread writes to it"""
+
+    def __init__(self):
+        self.thread = threading.current_thread()
+        self.routes = {}
+
+
+_local = threading.local()
+_registry = []  # ThreadStats of every thread that has served a request
+_retired = {}  # (route, method) -> RouteStats folded in from finished threads
+_registry_lock = threading.Lock()
+
+
+def _thread_stats():
+    stats = getattr(_local, 'stats', None)
+    if stats is None:
+        stats = _local.stats = ThreadStats()
+        with _registry_lock:
+            _registry.append(stats)
+    return stats
+
+
+def _record(route, method, status, seconds, size, queries, query_seconds):
+    routes = _thread_stats().routes
+    stats = routes.get((route, method))
+    if stats is None:
+        stats = routes[(route, method)] = RouteStats()
+
+    stats.count += 1
+    stats.statuses[status] = stats.statuses.get(status, 0) + 1
+    stats.latency[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+    stats.latency_sum += seconds
+    if size is not None:
+        stats.size[bisect_left(SIZE_BUCKETS, size)] += 1
+        stats.size_sum += size
+    stats.queries[bisect_left(QUERY_BUCKETS, queries)] += 1
+    stats.query_count += queries
+    stats.query_seconds += query_seconds
+
+
+class _RequestTimer:
+    """Timing of the request the current thread is serving"""
+
+    __slots__ = ('started', 'queries', 'query_seconds', 'size')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.size = 0
+
+
+def _before_request():
+    _local.timer = _RequestTimer()
+
+
+def _counting(iterable, timer):
+    """Pass a streamed body through, adding up its size"""
+    try:
+        for chunk in iterable:
+            timer.size += len(chunk)
+            yield chunk
+    finally:
+        close = getattr(iterable, 'close', None)
+        if close is not None:
+            close()
+
+
+def _after_request(response):
+    timer = getattr(_local, 'timer', None)
+    if timer is None:
+        return response
+
+    rule = request.url_rule
+    route = rule.rule if rule is not None else UNMATCHED_ROUTE
+    method = request.method
+    status = str(response.status_code)
+
+    size = response.content_length
+    if size is None and response.is_streamed and not response.direct_passthrough:
+        response.response = _counting(response.response, timer)
+
+    def finish():
+        _local.timer = None
+        _record(route, method, status, time.perf_counter() - timer.started,
+                size if size is not None else timer.size, timer.queries, timer.query_seconds)
+
+    # Runs once the body has been sent, so streaming time is included
+    response.call_on_close(finish)
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timer = getattr(_local, 'timer', None)
+    if timer is None or context is None:
+        return
+    timer.queries += 1
+    timer.query_seconds += time.perf_counter() - context._metrics_started
+
+
+def init_metrics(app, db):
+    """
+    Register the request hooks and the cursor listeners on every engine
+    Does nothing when app.config['METRICS_ENABLED'] is false
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def snapshot():
+    """
+    Totals over every thread
+    Returns: dict (route, method) -> RouteStats
+    """
+    with _registry_lock:
+        # Threads that have exited will not write again: fold them in for good
+        for stats in [s for s in _registry if not s.thread.is_alive()]:
+            _registry.remove(stats)
+            for key, route_stats in list(stats.routes.items()):
+                _retired.setdefault(key, RouteStats()).merge(route_stats)
+
+        totals = {}
+        for key, route_stats in _retired.items():
+            totals.setdefault(key, RouteStats()).merge(route_stats)
+        live = list(_registry)
+
+    for stats in live:
+        # list() copies the dict in one step; a concurrent new key is picked up next scrape
+        for key, route_stats in list(stats.routes.items()):
+            totals.setdefault(key, RouteStats()).merge(route_stats)
+    return totals
+
+
+def reset():
+    """
+    Forget everything recorded so far, e.g. the warm-up requests that
+    scripts/serve.py makes in the master before forking the workers
+    Only call it while no request is being served
+    """
+    with _registry_lock:
+        _registry.clear()
+        _retired.clear()
+    _local.stats = None
+    _local.timer = None
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram(lines, name, bounds, buckets, total, count, labels):
+    cumulative = 0
+    for bound, n in zip(bounds, buckets):
+        cumulative += n
+        lines.append(f"{name}_bucket{_labels(**labels, le=_number(bound))} {cumulative}")
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {count}")
+    lines.append(f"{name}_sum{_labels(**labels)} {_number(total)}")
+    lines.append(f"{name}_count{_labels(**labels)} {count}")
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+    totals = sorted(snapshot().items())
+    pid = os.getpid()
+    lines = []
+
+    lines.append("# HELP http_requests_total Requests served, by route, method and status")
+    lines.append("# TYPE http_requests_total counter")
+    for (route, method), stats in totals:
+        for status, n in sorted(stats.statuses.items()):
+            lines.append(f"http_requests_total{_labels(route=route, method=method, status=status, pid=pid)} {n}")
+
+    lines.append("# HELP http_request_duration_seconds Time from the start of a request until its body was sent")
+    lines.append("# TYPE http_request_duration_seconds histogram")
+    for (route, method), stats in totals:
+        _histogram(lines, 'http_request_duration_seconds', LATENCY_BUCKETS, stats.latency,
+                   stats.latency_sum, stats.count, dict(route=route, method=method, pid=pid))
+
+    lines.append("# HELP http_response_size_bytes Size of response bodies")
+    lines.append("# TYPE http_response_size_bytes histogram")
+    for (route, method), stats in totals:
+        _histogram(lines, 'http_response_size_bytes', SIZE_BUCKETS, stats.size,
+                   stats.size_sum, stats.count, dict(route=route, method=method, pid=pid))
+
+    lines.append("# HELP db_queries_per_request SQL statements executed per request")
+    lines.append("# TYPE db_queries_per_request histogram")
+    for (route, method), stats in totals:
+        _histogram(lines, 'db_queries_per_request', QUERY_BUCKETS, stats.queries,
+                   stats.query_count, stats.count, dict(route=route, method=method, pid=pid))
+
+    lines.append("# HELP db_query_duration_seconds_total Time spent executing SQL statements")
+    lines.append("# TYPE db_query_duration_seconds_total counter")
+    for (route, method), stats in totals:
+        lines.append(f"db_query_duration_seconds_total{_labels(route=route, method=method, pid=pid)} "
+                     f"{_number(stats.query_seconds)}")
+
+    return '\n'.join(lines) + '\n'
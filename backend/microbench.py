@@ -0,0 +1,305 @@
+"""
+Microbenchmarks for the hot db_utils functions and product serialization
+Each benchmark runs in a worker process against a scratch copy of a
+generated dataset (see backend/loadtest.py DATASETS), so write benchmarks
+never touch the real data and every dataset size gets a clean process.
+Results are compared with the committed baseline in
+benchmarks/baseline.json; a benchmark whose best time per call grew by
+more than the threshold is a regression (see scripts/microbench.py)
+The app is only imported inside the worker, where TECHFINDER_DB already
+points at the scratch copy
+"""
+
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from backend.loadtest import ensure_dataset, git_commit, timestamp, ROOT, DATASETS
+
+
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+DEFAULT_DATASETS = ('small', 'medium')
+DEFAULT_THRESHOLD = 20  # percent
+DEFAULT_REPEAT = 5
+MIN_REPEAT_SECONDS = 0.2  # Each repeat runs enough calls to last about this long
+
+PAGE_SIZE = 24
+BULK_SIZE = 100
+
+# name -> (description, repeats); slow benchmarks repeat less
+BENCHMARKS = {
+    'get_all_products': ("every product, catalog cache hit", DEFAULT_REPEAT),
+    'get_all_products.uncached': ("every product, straight from the database", 3),
+    'get_product_by_id': ("one product, catalog cache hit", DEFAULT_REPEAT),
+    'get_product_by_id.uncached': ("one random product from the database", DEFAULT_REPEAT),
+    'get_user_wishlist': ("a random user's whole wishlist", DEFAULT_REPEAT),
+    'authenticate_user': ("a successful login, including the password hash", 3),
+    'product_to_dict': (f"a page of {PAGE_SIZE} products to dicts", DEFAULT_REPEAT),
+    'products_response': (f"a page of {PAGE_SIZE} products to a JSON response, fragments cached", DEFAULT_REPEAT),
+    'products_response.cold': (f"a page of {PAGE_SIZE} products to a JSON response, nothing cached", DEFAULT_REPEAT),
+    'add_to_wishlist': ("one new wishlist item", DEFAULT_REPEAT),
+    'add_products_bulk': (f"{BULK_SIZE} new products", DEFAULT_REPEAT),
+}
+
+
+def _build(name, rng):
+    """
+    Zero-argument callable for one benchmark, with its fixtures ready
+    Must run inside the worker (imports the app)
+    """
+    from app import app, db
+    from backend import db_utils, serializers
+    from backend.models import User, Product
+    from backend.datagen import DEFAULT_PASSWORD
+    from backend.loadtest import username
+
+    with app.app_context():
+        product_count = db.session.execute(db.select(db.func.max(Product.id))).scalar()
+        user_count = db.session.execute(db.select(db.func.max(User.id))).scalar()
+
+    def random_products(count):
+        ids = rng.sample(range(1, product_count + 1), count)
+        with app.app_context():
+            return db.session.execute(db.select(Product).where(Product.id.in_(ids))).scalars().all()
+
+    if name == 'get_all_products':
+        db_utils.get_all_products()
+        return db_utils.get_all_products
+    if name == 'get_all_products.uncached':
+        return db_utils.get_all_products.uncached
+
+    if name == 'get_product_by_id':
+        ids = [rng.randint(1, product_count) for _ in range(100)]
+        for product_id in ids:
+            db_utils.get_product_by_id(product_id)
+        picks = itertools.cycle(ids)
+        return lambda: db_utils.get_product_by_id(next(picks))
+    if name == 'get_product_by_id.uncached':
+        return lambda: db_utils.get_product_by_id.uncached(rng.randint(1, product_count))
+
+    if name == 'get_user_wishlist':
+        return lambda: db_utils.get_user_wishlist(rng.randint(1, user_count))
+
+    if name == 'authenticate_user':
+        login = username(rng.randint(1, user_count))
+        return lambda: db_utils.authenticate_user(login, DEFAULT_PASSWORD)
+
+    if name == 'product_to_dict':
+        page = random_products(PAGE_SIZE)
+        return lambda: [serializers.product_to_dict(product) for product in page]
+
+    if name in ('products_response', 'products_response.cold'):
+        page = random_products(PAGE_SIZE)
+        cold = name.endswith('.cold')
+
+        def respond():
+            if cold:
+                serializers.product_json_cache.clear()
+            with app.app_context():
+                return serializers.products_response(page)
+        respond()
+        return respond
+
+    if name == 'add_to_wishlist':
+        # A brand-new user each time the products run out, so every call adds
+        # (created outside the timed call where possible: hashing is slow)
+        def new_user(number):
+            return db_utils.create_user(f"bench{number}", f"bench{number}@example.com", 'x')['id']
+        state = {'number': 1, 'user_id': new_user(1), 'product_id': 0}
+
+        def add():
+            if state['product_id'] == product_count:
+                state['number'] += 1
+                state['user_id'] = new_user(state['number'])
+                state['product_id'] = 0
+            state['product_id'] += 1
+            db_utils.add_to_wishlist(state['user_id'], state['product_id'])
+        return add
+
+    if name == 'add_products_bulk':
+        batches = iter(range(1, 1000000))
+
+        def add_batch():
+            batch = next(batches)
+            db_utils.add_products_bulk([
+                {'name': f"Bench product {batch}-{i}", 'description': 'Benchmark product',
+                 'price': 99.99, 'category': 'Audio', 'image_url': 'icons/headphones.png'}
+                for i in range(BULK_SIZE)
+            ])
+        return add_batch
+
+    raise ValueError(f"Unknown benchmark: {name}")
+
+
+def measure(func, repeat=DEFAULT_REPEAT, min_seconds=MIN_REPEAT_SECONDS):
+    """
+    Time func: one calibration call, then repeat rounds of enough calls to
+    last about min_seconds each
+    Returns: dict with loops per round and min/median microseconds per call
+    """
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    loops = max(1, min(100000, int(min_seconds / elapsed) if elapsed else 100000))
+
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        rounds.append((time.perf_counter() - started) / loops * 1e6)
+    return {
+        'loops': loops,
+        'repeat': repeat,
+        'min_us': round(min(rounds), 2),
+        'median_us': round(statistics.median(rounds), 2),
+    }
+
+
+def _reference_work():
+    """Fixed pure-Python workload used to gauge how fast the machine is right now"""
+    total = 0
+    for i in range(20000):
+        total += i * i % 7
+    return {str(i): i for i in range(2000)}, total
+
+
+def reference_speed():
+    """Best microseconds per _reference_work() call (see compare())"""
+    return measure(_reference_work, repeat=DEFAULT_REPEAT)['min_us']
+
+
+def run_in_worker(names, seed=42):
+    """
+    Run the named benchmarks in this process (the worker), in BENCHMARKS
+    order so reads run before writes change the data
+    Returns: {name: measure() result}
+    """
+    rng = random.Random(seed)
+    results = {}
+    for name in BENCHMARKS:
+        if name not in names:
+            continue
+        # Silence the progress prints of db_utils
+        with contextlib.redirect_stdout(io.StringIO()):
+            func = _build(name, rng)
+            results[name] = measure(func, repeat=BENCHMARKS[name][1])
+    return results
+
+
+def run_dataset(dataset, names=None, seed=42, progress=True):
+    """
+    Run benchmarks against a scratch copy of a generated dataset in a new process
+    Returns: {name: measure() result}
+    """
+    names = list(names or BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+    source = ensure_dataset(dataset, seed=seed, progress=progress)
+    with tempfile.TemporaryDirectory(prefix='microbench-') as scratch:
+        database = os.path.join(scratch, 'bench.db')
+        output = os.path.join(scratch, 'results.json')
+        shutil.copyfile(source, database)
+        subprocess.run([
+            sys.executable, os.path.join(ROOT, 'scripts', 'microbench.py'), 'worker',
+            '--output', output, '--seed', str(seed), '--only', ','.join(names)
+        ], env={**os.environ, 'TECHFINDER_DB': database, 'PYTHONHASHSEED': '0'}, check=True)
+        with open(output) as handle:
+            return json.load(handle)
+
+
+def run(datasets=DEFAULT_DATASETS, names=None, seed=42, progress=True):
+    """
+    Run benchmarks for every dataset
+    Returns: results dict with 'meta' and {dataset: {benchmark: stats}} under 'results'
+    """
+    results = {}
+    reference = [reference_speed()]
+    for dataset in datasets:
+        if dataset not in DATASETS:
+            raise ValueError(f"Unknown dataset: {dataset} (use one of {', '.join(DATASETS)})")
+        if progress:
+            print(f"→ {dataset} dataset ({DATASETS[dataset][0]:,} products)...")
+        results[dataset] = run_dataset(dataset, names, seed, progress)
+    reference.append(reference_speed())
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'started': timestamp(),
+            'seed': seed,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'reference_us': round(min(reference), 2),
+        },
+        'results': results,
+    }
+
+
+def recheck(results, rows, seed=42, progress=True):
+    """
+    Run the benchmarks compare() flagged as regressions once more, keeping
+    the better of the two results of each, so a noisy moment on the machine
+    does not fail the run
+    Returns: number of benchmarks re-run
+    """
+    flagged = {}
+    for dataset, name, *_, verdict in rows:
+        if verdict == 'regression':
+            flagged.setdefault(dataset, []).append(name)
+
+    for dataset, names in flagged.items():
+        for name, stats in run_dataset(dataset, names, seed, progress).items():
+            if stats['min_us'] < results['results'][dataset][name]['min_us']:
+                results['results'][dataset][name] = stats
+    return sum(len(names) for names in flagged.values())
+
+
+def speed_factor(baseline, current):
+    """
+    How much slower the machine ran the reference workload in current than
+    in baseline (1.0 when either run lacks it)
+    """
+    before = baseline['meta'].get('reference_us')
+    after = current['meta'].get('reference_us')
+    return after / before if before and after else 1.0
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Best time per call of every benchmark in both runs (the minimum is the
+    least disturbed by other load on the machine), with the change scaled
+    by speed_factor() so a machine that is slower across the board does not
+    read as a regression
+    Returns: list of (dataset, name, baseline us, current us, change %, verdict)
+    where verdict is 'regression', 'faster', 'ok' or 'new'
+    """
+    factor = speed_factor(baseline, current)
+    rows = []
+    for dataset, benchmarks in current['results'].items():
+        for name, stats in benchmarks.items():
+            before = baseline['results'].get(dataset, {}).get(name)
+            if before is None:
+                rows.append((dataset, name, None, stats['min_us'], None, 'new'))
+                continue
+            change = (stats['min_us'] / factor - before['min_us']) / before['min_us'] * 100
+            if change > threshold:
+                verdict = 'regression'
+            elif change < -threshold:
+                verdict = 'faster'
+            else:
+                verdict = 'ok'
+            rows.append((dataset, name, before['min_us'], stats['min_us'], round(change, 1), verdict))
+    return rows
@@ -1,6 +1,6 @@
 from app import db
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from backend import passwords
 
 
 class User(db.Model):
@@ -18,12 +18,16 @@ class User(db.Model):
     wishlist_items = db.relationship('WishlistItem', backref='user', lazy=True, cascade='all, delete-orphan')
 
     def set_password(self, password):
-        """Hash and set the user's password"""
-        self.password_hash = generate_password_hash(password, method='pbkdf2:sha256')
+        """Hash and set the user's password (runs in the hashing pool)"""
+        self.password_hash = passwords.hash_password(password)
 
     def check_password(self, password):
-        """Verify the user's password"""
-        return check_password_hash(self.password_hash, password)
+        """Verify the user's password (runs in the hashing pool)"""
+        return passwords.verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """True if the stored hash predates the configured hash method/cost"""
+        return passwords.needs_rehash(self.password_hash)
 
     def __repr__(self):
         return f'<User {self.username}>'
@@ -34,7 +38,7 @@ class Product(db.Model):
     __tablename__ = 'products'
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(200), nullable=False)
+    name = db.Column(db.String(200), nullable=False, index=True)
     description = db.Column(db.Text, nullable=False)
     price = db.Column(db.Float, nullable=False)
     image_url = db.Column(db.String(500))
@@ -42,10 +46,24 @@ class Product(db.Model):
     category = db.Column(db.String(100))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Number of wishlists holding this product, kept by backend/popularity.py
+    wishlist_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Relationships
     wishlist_items = db.relationship('WishlistItem', backref='product', lazy=True, cascade='all, delete-orphan')
 
+    # Listing filters/sorts (backend/listing.py): each filter + sort pair
+    # is an index range scan, see scripts/check_query_plans.py
+    __table_args__ = (
+        db.Index('ix_products_category', 'category'),  # id order within a category
+        db.Index('ix_products_category_price', 'category', 'price'),
+        db.Index('ix_products_category_created', 'category', 'created_at'),
+        db.Index('ix_products_price', 'price'),
+        db.Index('ix_products_created', 'created_at'),
+        db.Index('ix_products_popularity', 'wishlist_count'),
+        db.Index('ix_products_category_popularity', 'category', 'wishlist_count'),
+    )
+
     def __repr__(self):
         return f'<Product {self.name}>'
 
@@ -59,8 +77,13 @@ class WishlistItem(db.Model):
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
     added_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    # Composite unique constraint to prevent duplicate wishlist entries
-    __table_args__ = (db.UniqueConstraint('user_id', 'product_id', name='unique_user_product'),)
+    # Composite unique constraint to prevent duplicate wishlist entries;
+    # (user_id, added_at) serves the ordered/paged wishlist read
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'product_id', name='unique_user_product'),
+        db.Index('ix_wishlist_user_added', 'user_id', 'added_at'),
+        db.Index('ix_wishlist_product', 'product_id'),
+    )
 
     def __repr__(self):
         return f'<WishlistItem user={self.user_id} product={self.product_id}>'
@@ -0,0 +1,109 @@
+"""
+Rendered-page cache for the public catalog pages
+A page is rendered and compressed once per catalog version; later hits pick
+the stored identity/gzip/brotli body that matches Accept-Encoding, so a
+cached page costs a dict lookup plus building the response object
+"""
+
+import gzip
+import hashlib
+
+from flask import Response, request, make_response
+
+from app import app
+from backend.cache import LRUCache, catalog_version
+
+try:
+    import brotli
+except ImportError:  # optional dependency, only gzip variants are stored
+    brotli = None
+
+
+# Entries are keyed by catalog version, so writes invalidate them at once;
+# the TTL only bounds staleness for writes made by other processes
+page_cache = LRUCache(
+    maxsize=app.config.get('PAGE_CACHE_SIZE', 256),
+    ttl=app.config.get('PAGE_CACHE_TTL', 300)
+)
+
+
+class CachedPage:
+    """One rendered page and its precompressed variants"""
+
+    __slots__ = ('variants', 'etags')
+
+    def __init__(self, html):
+        body = html.encode('utf-8')
+        self.variants = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9)}
+        if brotli is not None:
+            self.variants['br'] = brotli.compress(body, mode=brotli.MODE_TEXT, quality=11)
+
+        # Each encoding is a different representation, so it gets its own ETag
+        digest = hashlib.sha1(body).hexdigest()[:24]
+        self.etags = {
+            encoding: digest if encoding == 'identity' else f"{digest}-{encoding}"
+            for encoding in self.variants
+        }
+
+    def negotiate(self):
+        """Best stored encoding for the current request's Accept-Encoding"""
+        accepted = request.accept_encodings
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and accepted[encoding]:
+                return encoding
+        return 'identity'
+
+
+def _tee_into_cache(key, chunks):
+    """Pass streamed chunks through, caching the page once the last one is sent"""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    page_cache.set(key, CachedPage(''.join(parts)))
+
+
+def cached_page(kind, render, *key, stream=None):
+    """
+    Response for a page rendered by render(), reusing the cached copy for
+    (kind, catalog version, key) when there is one
+    stream: optional callable returning the page as an iterator of str
+    chunks; a miss is then streamed to the client and cached once complete
+    instead of being rendered in full before the first byte goes out
+    render()/stream() run only on a miss; if they raise, nothing is cached
+    """
+    if not app.config.get('PAGE_CACHE_ENABLED', True):
+        if stream is not None:
+            return Response(stream(), mimetype='text/html')
+        return make_response(render())
+
+    cache_key = (kind, catalog_version(), key)
+    page = page_cache.get(cache_key)
+    if page is None:
+        if stream is not None:
+            response = Response(_tee_into_cache(cache_key, stream()), mimetype='text/html')
+            response.vary.add('Accept-Encoding')
+            return response
+        page = CachedPage(render())
+        page_cache.set(cache_key, page)
+
+    encoding = page.negotiate()
+    etag = page.etags[encoding]
+
+    if request.if_none_match and request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(page.variants[encoding])
+        response.content_type = 'text/html; charset=utf-8'
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def get_page_cache_stats():
+    """Hit/miss counters for the rendered-page cache"""
+    return page_cache.stats()
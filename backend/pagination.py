@@ -0,0 +1,77 @@
+"""
+Cursor helpers shared by the paginated product endpoints
+Cursors are opaque to clients: url-safe base64 of a small JSON object
+"""
+
+import base64
+import json
+
+
+def encode_cursor(payload):
+    """Encode a dict of position values as an opaque cursor string"""
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor
+    Raises ValueError if the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(payload, dict):
+        raise ValueError('Invalid cursor')
+    return payload
+
+
+def decode_int_cursor(cursor, key):
+    """
+    Decode a cursor and return its non-negative integer value for key
+    Raises ValueError if the cursor is malformed
+    """
+    value = decode_cursor(cursor).get(key)
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise ValueError('Invalid cursor')
+    return value
+
+
+def clamp_limit(limit, default, maximum):
+    """Clamp a client supplied page size to 1..maximum"""
+    if limit is None:
+        return default
+    return max(1, min(int(limit), maximum))
+
+
+class LazyPage:
+    """
+    One keyset page whose rows are read only when it is iterated
+    load() must return an iterable of up to limit + 1 rows; the extra row
+    only tells whether there is a next page, and next_cursor is set once
+    iteration reaches it
+    """
+
+    def __init__(self, load, limit, cursor_for):
+        self._load = load
+        self.limit = limit
+        self._cursor_for = cursor_for
+        self.next_cursor = None
+
+    def __iter__(self):
+        last = None
+        rows = self._load()
+        try:
+            for count, row in enumerate(rows):
+                if count == self.limit:
+                    self.next_cursor = self._cursor_for(last)
+                    break
+                last = row
+                yield row
+        finally:
+            # Release the cursor (and whatever load() holds) as soon as the page ends
+            close = getattr(rows, 'close', None)
+            if close is not None:
+                close()
@@ -0,0 +1,101 @@
+"""
+Password hashing off the request thread
+pbkdf2 runs in a small process pool so a burst of logins cannot pin every
+request thread; when too many hashes are already queued the caller gets
+PasswordPoolBusy immediately and the route answers 503
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import (
+    generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+)
+
+from app import app
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the hashing pool is saturated or too slow to answer"""
+
+
+_pool = None
+_pool_pid = None
+_slots = None
+_lock = threading.Lock()
+
+
+# Cost werkzeug uses when a method leaves it out
+SCRYPT_DEFAULT_COST = '32768:8:1'  # n:r:p
+
+
+def _spell_out(method):
+    """
+    A werkzeug hash method with its defaults filled in, the way werkzeug
+    writes it in front of a hash, e.g. 'pbkdf2' -> 'pbkdf2:sha256:1000000',
+    'scrypt' -> 'scrypt:32768:8:1'
+    """
+    name, *args = method.split(':')
+    if name == 'pbkdf2':
+        if not args:
+            args = ['sha256']
+        if len(args) < 2:
+            args.append(str(DEFAULT_PBKDF2_ITERATIONS))
+    elif name == 'scrypt' and not args:
+        args = SCRYPT_DEFAULT_COST.split(':')
+    return ':'.join([name, *args])
+
+
+def hash_method():
+    """Configured werkzeug hash method with its cost spelled out"""
+    return _spell_out(app.config.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256'))
+
+
+def _get_pool():
+    """Create the pool lazily, and again after a fork (e.g. in each server worker)"""
+    global _pool, _pool_pid, _slots
+    with _lock:
+        if _pool is None or _pool_pid != os.getpid():
+            workers = app.config.get('PASSWORD_HASH_WORKERS', 2)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_pid = os.getpid()
+            _slots = threading.BoundedSemaphore(app.config.get('PASSWORD_HASH_MAX_PENDING', 32))
+        return _pool, _slots
+
+
+def _run(func, *args):
+    """Run func in the pool, or inline when PASSWORD_HASH_WORKERS is 0"""
+    if not app.config.get('PASSWORD_HASH_WORKERS', 2):
+        return func(*args)
+
+    pool, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise PasswordPoolBusy('Too many password operations queued')
+
+    try:
+        future = pool.submit(func, *args)
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+
+    try:
+        return future.result(timeout=app.config.get('PASSWORD_HASH_TIMEOUT', 10))
+    except FutureTimeout:
+        raise PasswordPoolBusy('Password operation timed out')
+
+
+def hash_password(password):
+    """Hash a password with the configured method"""
+    return _run(generate_password_hash, password, hash_method())
+
+
+def verify_password(password_hash, password):
+    """Check a password against a stored hash"""
+    return _run(check_password_hash, password_hash, password)
+
+
+def needs_rehash(password_hash):
+    """True if the stored hash was made with a different method or cost"""
+    return _spell_out(password_hash.split('$', 1)[0]) != hash_method()
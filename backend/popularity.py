@@ -0,0 +1,81 @@
+"""
+Denormalized wishlist counters
+Product.wishlist_count is adjusted in the same transaction as every
+wishlist insert or delete made through db_utils, so popularity sorts are
+an index scan on wishlist_count instead of an aggregate over
+wishlist_items. reconcile() repairs counters left behind by writes that
+bypassed these helpers (see scripts/reconcile_wishlist_counts.py)
+"""
+
+from sqlalchemy import func
+
+from app import db
+from backend.models import Product, WishlistItem
+
+
+def adjust(product_ids, delta):
+    """
+    Add delta to the counter of each product (never going below zero)
+    Runs in the caller's transaction. updated_at is left alone: the counter
+    is not part of a product's cached JSON or its ETag
+    """
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+    db.session.execute(
+        db.update(Product).where(Product.id.in_(product_ids)).values(
+            wishlist_count=func.max(Product.wishlist_count + delta, 0),
+            updated_at=Product.updated_at
+        ),
+        execution_options={'synchronize_session': False}
+    )
+
+
+def release_user(user_id):
+    """
+    Delete every wishlist row of a user and uncount them, e.g. before the
+    user is deleted; runs in the caller's transaction
+    Returns: number of wishlist rows removed
+    """
+    product_ids = db.session.execute(
+        db.delete(WishlistItem).where(WishlistItem.user_id == user_id).returning(WishlistItem.product_id)
+    ).scalars().all()
+    adjust(product_ids, -1)
+    return len(product_ids)
+
+
+def _actual_count():
+    """Correlated COUNT of a product's wishlist rows (one seek on ix_wishlist_product)"""
+    return db.select(func.count(WishlistItem.id)).where(
+        WishlistItem.product_id == Product.id
+    ).correlate(Product).scalar_subquery()
+
+
+def find_drift():
+    """
+    Products whose counter disagrees with wishlist_items
+    Returns: list of (product id, name, stored count, actual count)
+    """
+    actual = _actual_count()
+    return db.session.execute(
+        db.select(Product.id, Product.name, Product.wishlist_count, actual)
+        .where(Product.wishlist_count != actual)
+        .order_by(Product.id)
+    ).all()
+
+
+def reconcile():
+    """
+    Reset every drifted counter to the real count and commit
+    Returns: number of products fixed
+    """
+    actual = _actual_count()
+    fixed = db.session.execute(
+        db.update(Product).where(Product.wishlist_count != actual).values(
+            wishlist_count=actual,
+            updated_at=Product.updated_at
+        ).returning(Product.id),
+        execution_options={'synchronize_session': False}
+    ).scalars().all()
+    db.session.commit()
+    return len(fixed)
@@ -0,0 +1,63 @@
+"""
+SQL statement counting for catching N+1 regressions
+Usage:
+    with assert_max_queries(1):
+        get_user_wishlist(user_id)
+"""
+
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import app, db
+
+
+class QueryCounter:
+    """Statements executed on one thread while a counting block is active"""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+@contextmanager
+def count_queries():
+    """
+    Count SQL statements the current thread sends to the database, on every
+    engine (the read-only bind included)
+    Yields a QueryCounter that fills in as statements run
+    """
+    counter = QueryCounter()
+    thread_id = threading.get_ident()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread_id:
+            counter.statements.append(statement)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@contextmanager
+def assert_max_queries(limit):
+    """Raise AssertionError if the block issues more than limit statements"""
+    with count_queries() as counter:
+        yield counter
+
+    if counter.count > limit:
+        listing = '\n'.join(f'  {i + 1}. {s}' for i, s in enumerate(counter.statements))
+        raise AssertionError(
+            f"Expected at most {limit} queries, got {counter.count}:\n{listing}"
+        )
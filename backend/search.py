@@ -0,0 +1,170 @@
+"""
+Full-text product search backed by an SQLite FTS5 index
+The index covers Product.name, description and category and is kept in sync
+by the product write functions in db_utils
+"""
+
+import re
+
+from sqlalchemy import text, bindparam
+
+from app import db
+from backend.models import Product
+from backend.pagination import encode_cursor, decode_int_cursor, clamp_limit
+
+
+FTS_TABLE = 'products_fts'
+
+# bm25() column weights, in FTS column order: name, description, category
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+CATEGORY_WEIGHT = 4.0
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Engines whose FTS table has already been verified in this process
+_ready_engines = set()
+
+
+def ensure_search_index():
+    """
+    Create the FTS table if it does not exist yet
+    A freshly created index is populated from the products table
+    Must be called inside an app context
+    """
+    engine = db.engine
+    if engine.url in _ready_engines:
+        return
+
+    exists = db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': FTS_TABLE}
+    ).first()
+
+    if not exists:
+        db.session.execute(text(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "name, description, category, "
+            "tokenize = 'unicode61 remove_diacritics 2', "
+            "prefix = '2 3 4')"
+        ))
+        _populate_index()
+        db.session.commit()
+        print("Search index created")
+
+    _ready_engines.add(engine.url)
+
+
+def rebuild_search_index():
+    """Drop every indexed row and re-index the whole products table"""
+    ensure_search_index()
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    _populate_index()
+    db.session.commit()
+
+
+def _populate_index():
+    """Copy every product into the FTS table in one statement"""
+    db.session.execute(text(
+        f"INSERT INTO {FTS_TABLE} (rowid, name, description, category) "
+        "SELECT id, name, description, COALESCE(category, '') FROM products"
+    ))
+
+
+def index_products(products):
+    """
+    Add or refresh the index rows for the given products
+    Runs in the caller's transaction; products must already have an id
+    Call ensure_search_index() before the transaction starts
+    """
+    rows = [{
+        'id': p.id,
+        'name': p.name,
+        'description': p.description,
+        'category': p.category or ''
+    } for p in products]
+    if not rows:
+        return
+
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), rows)
+    db.session.execute(text(
+        f"INSERT INTO {FTS_TABLE} (rowid, name, description, category) "
+        "VALUES (:id, :name, :description, :category)"
+    ), rows)
+
+
+def index_product_ids(product_ids):
+    """
+    Index freshly inserted products straight from the products table
+    Runs in the caller's transaction; used by bulk imports
+    """
+    if not product_ids:
+        return
+    db.session.execute(
+        text(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, description, category) "
+            "SELECT id, name, description, COALESCE(category, '') FROM products "
+            "WHERE id IN :ids"
+        ).bindparams(bindparam('ids', expanding=True)),
+        {'ids': list(product_ids)}
+    )
+
+
+def unindex_product(product_id):
+    """Remove a product from the index; runs in the caller's transaction"""
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {'id': product_id})
+
+
+def build_match_query(query):
+    """
+    Turn free user input into an FTS5 MATCH expression
+    Every word must match, and each word also matches as a prefix
+    Returns None if the input contains no searchable words
+    """
+    tokens = _TOKEN_RE.findall(query.lower())
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search(query, limit=DEFAULT_LIMIT, cursor=None):
+    """
+    Run a ranked search over the catalog
+    Returns: (list of Product objects best match first, next cursor or None)
+    Raises ValueError for a malformed cursor
+    """
+    limit = clamp_limit(limit, DEFAULT_LIMIT, MAX_LIMIT)
+    offset = decode_int_cursor(cursor, 'o') if cursor else 0
+
+    match = build_match_query(query)
+    if match is None:
+        return [], None
+
+    ensure_search_index()
+
+    # Fetch one extra row to know whether another page exists
+    statement = text(
+        f"SELECT products.* FROM {FTS_TABLE} "
+        f"JOIN products ON products.id = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH :match "
+        f"ORDER BY bm25({FTS_TABLE}, :w_name, :w_description, :w_category), products.id "
+        "LIMIT :limit OFFSET :offset"
+    ).bindparams(
+        match=match,
+        w_name=NAME_WEIGHT,
+        w_description=DESCRIPTION_WEIGHT,
+        w_category=CATEGORY_WEIGHT,
+        limit=limit + 1,
+        offset=offset
+    )
+    products = db.session.query(Product).from_statement(statement).all()
+
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        next_cursor = encode_cursor({'o': offset + limit})
+
+    return products, next_cursor
@@ -0,0 +1,131 @@
+"""
+Product serialization shared by every JSON endpoint
+Encoded product fragments are cached by (id, updated_at, fields), so list
+responses are assembled by joining pre-encoded bytes instead of re-encoding
+each product dict on every request
+"""
+
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+from backend.cache import LRUCache
+
+try:
+    import orjson
+except ImportError:  # optional dependency, stdlib json is used instead
+    orjson = None
+
+
+# Public product columns, in API order
+PRODUCT_FIELDS = ('id', 'name', 'category', 'price', 'description', 'image_url', 'external_link')
+
+# Only returned when asked for with fields=; counters change without
+# touching updated_at, so their values are part of the fragment cache key
+OPTIONAL_FIELDS = ('wishlist_count',)
+
+# Entries never go stale (updated_at is part of the key), the TTL only
+# lets fragments of deleted products age out
+product_json_cache = LRUCache(maxsize=4096, ttl=3600)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes with orjson when it is installed
+    Output matches DefaultJSONProvider: sorted keys, same default() hook
+    """
+
+    def dumps_bytes(self, obj, **kwargs):
+        """Serialize obj to UTF-8 JSON bytes"""
+        if orjson is None:
+            kwargs.setdefault('separators', (',', ':'))
+            return super().dumps(obj, **kwargs).encode()
+
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj, **kwargs).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = self.dumps_bytes(obj, indent=2) if indent else self.dumps_bytes(obj)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def _dumps_bytes(obj):
+    """Encode with the app's JSON provider"""
+    provider = current_app.json
+    if isinstance(provider, FastJSONProvider):
+        return provider.dumps_bytes(obj)
+    return provider.dumps(obj).encode()
+
+
+def resolve_fields(fields=None):
+    """
+    Normalize a requested projection to a tuple of public fields in API order
+    'id' is always included; raises ValueError for unknown fields
+    """
+    if not fields:
+        return PRODUCT_FIELDS
+    known = PRODUCT_FIELDS + OPTIONAL_FIELDS
+    unknown = [f for f in fields if f not in known]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return tuple(f for f in known if f == 'id' or f in fields)
+
+
+def product_to_dict(product, fields=None):
+    """Public fields of a Product (or a projected row) as a dict"""
+    return {field: getattr(product, field) for field in (fields or PRODUCT_FIELDS)}
+
+
+def encode_product(product, fields=None):
+    """
+    JSON bytes for one product, cached until its updated_at changes
+    product may be a Product or a row that also selected updated_at
+    fields: a tuple from resolve_fields(), or None for every public field
+    """
+    fields = fields or PRODUCT_FIELDS
+    key = (product.id, product.updated_at, fields) + tuple(
+        getattr(product, f) for f in OPTIONAL_FIELDS if f in fields
+    )
+    return product_json_cache.get_or_load(
+        key, lambda: _dumps_bytes(product_to_dict(product, fields))
+    )
+
+
+def _assemble(envelope, key, fragment, status):
+    """Splice a pre-encoded fragment into an encoded envelope dict"""
+    head = _dumps_bytes(envelope)
+    body = head[:-1] + b',"' + key.encode() + b'":' + fragment + b'}\n'
+    return current_app.response_class(body, status=status, mimetype='application/json')
+
+
+def product_response(product, status=200, **envelope):
+    """JSON response of the form {"success": true, "product": {...}, **envelope}"""
+    envelope.setdefault('success', True)
+    return _assemble(envelope, 'product', encode_product(product), status)
+
+
+def products_response(products, fields=None, status=200, **envelope):
+    """
+    JSON response of the form {"success": true, "products": [...], "count": n, **envelope}
+    fields: optional projection; every product must carry updated_at
+    """
+    fields = resolve_fields(fields)
+    fragments = [encode_product(product, fields) for product in products]
+    envelope.setdefault('success', True)
+    envelope['count'] = len(fragments)
+    return _assemble(envelope, 'products', b'[' + b','.join(fragments) + b']', status)
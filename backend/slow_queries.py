@@ -0,0 +1,242 @@
+"""
+Slow-query log
+Cursor listeners time every statement the app's engines execute (from
+db_utils, scripts/db_admin.py or anywhere else). A statement slower than
+app.config['SLOW_QUERY_THRESHOLD_MS'] is logged together with its
+parameter types (the values only with SLOW_QUERY_LOG_PARAMS, as they
+include password hashes and emails), duration, the route or script that
+issued it, the calling line of our code and SQLite's EXPLAIN QUERY PLAN
+(taken on the same connection, so it sees the same schema). Entries are
+appended as JSON lines to SLOW_QUERY_LOG_PATH, where any process can read
+them back; aggregate() groups them by statement shape (literals and IN
+lists normalized), which is what the db_admin report shows.
+Durations cover the execute call, i.e. until SQLite has the first row
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Statements whose plan is meaningless or that EXPLAIN cannot take
+_NO_PLAN = ('PRAGMA', 'BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'EXPLAIN',
+            'CREATE', 'DROP', 'ALTER', 'ANALYZE', 'VACUUM')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+_FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+MAX_PARAMS = 20
+MAX_PARAM_LENGTH = 200
+
+_write_lock = threading.Lock()
+
+
+def normalize(statement):
+    """Statement shape: literals become ?, IN lists (?, ...), whitespace collapsed"""
+    shape = _STRING.sub('?', statement)
+    shape = _NUMBER.sub('?', shape)
+    shape = _IN_LIST.sub('(?, ...)', shape)
+    return _SPACE.sub(' ', shape).strip()
+
+
+def fingerprint(shape):
+    """Short stable id of a statement shape"""
+    return hashlib.sha1(shape.encode()).hexdigest()[:12]
+
+
+def full_scans(plan):
+    """Tables a plan reads in full without an index, e.g. ['products']"""
+    return [match.group(1) for match in map(_FULL_SCAN.match, plan) if match]
+
+
+def _jsonable_params(parameters, executemany, with_values=False):
+    """
+    Parameters as a short JSON-safe list (the first row of an executemany)
+    Only type names, e.g. ['str', 'int'], unless with_values
+    """
+    if executemany and parameters:
+        parameters = parameters[0]
+    if isinstance(parameters, dict):
+        parameters = list(parameters.values())
+    values = []
+    for value in list(parameters or ())[:MAX_PARAMS]:
+        if not with_values:
+            value = type(value).__name__
+        elif not isinstance(value, (int, float, str, type(None))):
+            value = repr(value)
+        if isinstance(value, str) and len(value) > MAX_PARAM_LENGTH:
+            value = value[:MAX_PARAM_LENGTH] + '…'
+        values.append(value)
+    return values
+
+
+def _source():
+    """The route being served, or the script that is running"""
+    if has_request_context():
+        rule = request.url_rule
+        return f"{request.method} {rule.rule if rule is not None else request.path}"
+    script = sys.argv[0] if sys.argv and sys.argv[0] else '<interactive>'
+    if os.path.isabs(script) and script.startswith(ROOT):
+        script = os.path.relpath(script, ROOT)
+    return f"script {script}"
+
+
+def _caller():
+    """The innermost line of this project's code on the stack, e.g. 'backend/db_utils.py:533 in add_product'"""
+    frame = sys._getframe(2)
+    this_file = os.path.abspath(__file__)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if (filename.startswith(ROOT) and filename != this_file
+                and 'site-packages' not in filename):
+            return f"{os.path.relpath(filename, ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def _explain(cursor, statement, parameters, executemany):
+    """EXPLAIN QUERY PLAN details on the statement's own connection ([] if it cannot be explained)"""
+    if statement.lstrip().split(None, 1)[0].upper() in _NO_PLAN:
+        return []
+    if executemany:
+        parameters = parameters[0] if parameters else ()
+    try:
+        plan_cursor = cursor.connection.cursor()
+        try:
+            rows = plan_cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ()).fetchall()
+        finally:
+            plan_cursor.close()
+    except Exception:
+        return []
+    return [row[3] for row in rows]
+
+
+def _append(path, max_bytes, entry):
+    line = json.dumps(entry, default=str) + '\n'
+    with _write_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if max_bytes and os.path.exists(path) and os.path.getsize(path) > max_bytes:
+            os.replace(path, path + '.1')
+        with open(path, 'a', encoding='utf-8') as handle:
+            handle.write(line)
+
+
+def init_slow_query_log(app, db):
+    """
+    Register the timing listeners on every engine
+    Does nothing when app.config['SLOW_QUERY_THRESHOLD_MS'] is 0 or None
+    """
+    threshold_ms = app.config.get('SLOW_QUERY_THRESHOLD_MS')
+    if not threshold_ms:
+        return
+    threshold = threshold_ms / 1000
+    path = app.config['SLOW_QUERY_LOG_PATH']
+    max_bytes = app.config.get('SLOW_QUERY_LOG_MAX_BYTES')
+    with_values = app.config.get('SLOW_QUERY_LOG_PARAMS', False)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_started = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is None:
+            return
+        seconds = time.perf_counter() - context._slow_query_started
+        if seconds < threshold:
+            return
+
+        shape = normalize(statement)
+        plan = _explain(cursor, statement, parameters, executemany)
+        entry = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'ms': round(seconds * 1000, 2),
+            'shape_id': fingerprint(shape),
+            'shape': shape,
+            'statement': statement,
+            'params': _jsonable_params(parameters, executemany, with_values),
+            'executemany': executemany,
+            'source': _source(),
+            'caller': _caller(),
+            'plan': plan,
+            'full_scans': full_scans(plan),
+        }
+        app.logger.warning("Slow query (%.1f ms, %s, %s): %s", entry['ms'], entry['source'],
+                           entry['caller'], shape)
+        try:
+            _append(path, max_bytes, entry)
+        except OSError as error:
+            app.logger.warning("Could not write the slow-query log: %s", error)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+
+
+def read_log(path):
+    """Entries of the log (the rotated file first), skipping damaged lines"""
+    entries = []
+    for name in (path + '.1', path):
+        if not os.path.exists(name):
+            continue
+        with open(name, encoding='utf-8') as handle:
+            for line in handle:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+    return entries
+
+
+def aggregate(entries):
+    """
+    Group log entries by statement shape, slowest in total first
+    Returns: list of dicts with shape, count, total/avg/max ms, the sources and
+    callers that issued it, full scans seen and the latest entry ('last')
+    """
+    groups = {}
+    for entry in entries:
+        group = groups.get(entry['shape_id'])
+        if group is None:
+            group = groups[entry['shape_id']] = {
+                'shape_id': entry['shape_id'], 'shape': entry['shape'], 'count': 0,
+                'total_ms': 0.0, 'max_ms': 0.0, 'sources': Counter(), 'callers': Counter(),
+                'full_scans': set(), 'last': entry,
+            }
+        group['count'] += 1
+        group['total_ms'] += entry['ms']
+        group['max_ms'] = max(group['max_ms'], entry['ms'])
+        group['sources'][entry.get('source')] += 1
+        if entry.get('caller'):
+            group['callers'][entry['caller']] += 1
+        group['full_scans'].update(entry.get('full_scans') or ())
+        if entry['time'] >= group['last']['time']:
+            group['last'] = entry
+
+    for group in groups.values():
+        group['total_ms'] = round(group['total_ms'], 2)
+        group['avg_ms'] = round(group['total_ms'] / group['count'], 2)
+        group['full_scans'] = sorted(group['full_scans'])
+    return sorted(groups.values(), key=lambda g: g['total_ms'], reverse=True)
+
+
+def clear_log(path):
+    """Delete the log and its rotated copy"""
+    with _write_lock:
+        for name in (path, path + '.1'):
+            if os.path.exists(name):
+                os.remove(name)
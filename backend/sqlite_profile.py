@@ -0,0 +1,117 @@
+"""
+SQLite production engine profile
+Applies WAL and the other connection pragmas on every new connection, and
+optionally routes plain SELECTs issued while serving GET/HEAD requests to
+a separate read-only (mode=ro) connection pool
+"""
+
+import logging
+
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, exc
+
+
+READONLY_BIND = 'readonly'
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',         # readers no longer block on the writer
+    'synchronous': 'NORMAL',       # safe with WAL, far fewer fsyncs
+    'busy_timeout': 5000,          # ms to wait for a lock instead of "database is locked"
+    'cache_size': -65536,          # negative = KiB, i.e. 64 MiB page cache per connection
+    'mmap_size': 268435456,        # 256 MiB memory-mapped I/O
+    'temp_store': 'MEMORY',
+}
+
+# Pragmas a read-only connection cannot (or need not) set
+_WRITE_ONLY_PRAGMAS = ('journal_mode', 'synchronous')
+
+
+def read_only_url(path):
+    """SQLAlchemy URL opening the database file with SQLite's mode=ro"""
+    return f"sqlite:///file:{path}?mode=ro&uri=true"
+
+
+def _connect_listener(app, bind_name, pragmas):
+    """Build a 'connect' listener that sets pragmas and logs them once"""
+    state = {'logged': False}
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+
+            if not state['logged']:
+                state['logged'] = True
+                effective = []
+                for name in pragmas:
+                    row = cursor.execute(f"PRAGMA {name}").fetchone()
+                    effective.append(f"{name}={row[0] if row else '?'}")
+                app.logger.info("SQLite profile (%s): %s", bind_name, ' '.join(effective))
+        finally:
+            cursor.close()
+
+    return on_connect
+
+
+def apply_sqlite_profile(app, db):
+    """
+    Register the pragma listener on every SQLite engine of the app and open
+    one connection each, so the pragmas in effect are logged at startup
+    Pragmas come from DEFAULT_PRAGMAS updated with app.config['SQLITE_PRAGMAS']
+    """
+    pragmas = dict(DEFAULT_PRAGMAS)
+    pragmas.update(app.config.get('SQLITE_PRAGMAS') or {})
+
+    # Nothing configures logging, which would leave the app logger at WARNING
+    if app.logger.level == logging.NOTSET:
+        app.logger.setLevel(logging.INFO)
+
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            if engine.dialect.name != 'sqlite':
+                continue
+
+            if bind_key == READONLY_BIND:
+                engine_pragmas = {k: v for k, v in pragmas.items() if k not in _WRITE_ONLY_PRAGMAS}
+                engine_pragmas['query_only'] = 'ON'
+            else:
+                engine_pragmas = pragmas
+
+            event.listen(
+                engine, 'connect',
+                _connect_listener(app, bind_key or 'primary', engine_pragmas)
+            )
+
+            # Connect once now so the effective pragmas are logged at startup, then
+            # drop the connection so none is inherited by forked server workers
+            try:
+                with engine.connect():
+                    pass
+            except exc.OperationalError as error:
+                # e.g. the mode=ro bind before the database file exists
+                app.logger.warning("SQLite profile (%s) not applied yet: %s", bind_key or 'primary', error)
+            engine.dispose()
+
+
+class ReadRoutingSession(Session):
+    """
+    Session that sends plain SELECTs made during GET/HEAD requests to the
+    read-only bind when one is configured; everything else (writes, raw SQL,
+    flushes) stays on the primary engine
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and clause is not None
+            and getattr(clause, 'is_select', False)
+            and READONLY_BIND in self._db.engines
+            and has_request_context()
+            and request.method in ('GET', 'HEAD')
+        ):
+            return self._db.engines[READONLY_BIND]
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,51 @@
+"""
+Template rendering helpers
+Streamed pages are sent as the template renders instead of being built as
+one string first, and compiled templates are kept in a bytecode cache on
+disk so a fresh worker does not recompile them
+"""
+
+import os
+
+from flask import Response, current_app, stream_template
+from jinja2 import FileSystemBytecodeCache
+
+
+def configure_bytecode_cache(app):
+    """Store compiled templates under TEMPLATE_BYTECODE_CACHE_DIR, if set"""
+    directory = app.config.get('TEMPLATE_BYTECODE_CACHE_DIR')
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+def _coalesce(chunks, size):
+    """Join Jinja's many small output pieces into chunks of at least size characters"""
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= size:
+            yield ''.join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_chunks(template_name, **context):
+    """
+    Render a template lazily as an iterator of str chunks
+    The first chunk (head and the first cards) is sent as soon as it fills
+    TEMPLATE_STREAM_CHUNK_SIZE; the request context stays available
+    until the last chunk
+    """
+    size = current_app.config.get('TEMPLATE_STREAM_CHUNK_SIZE', 8192)
+    return _coalesce(stream_template(template_name, **context), size)
+
+
+def stream_page(template_name, **context):
+    """Streamed text/html response for a template"""
+    return Response(stream_chunks(template_name, **context), mimetype='text/html')
@@ -0,0 +1,56 @@
+"""
+Process warm-up
+Fills the in-process caches (templates, asset manifest, username/email
+Bloom filters, catalog reads and the rendered home page) so the first
+requests of a process do not pay for them. scripts/serve.py runs this
+once in the server master before forking, so every worker starts with
+the same warm pages, shared copy-on-write
+"""
+
+import time
+
+from app import app, db
+from backend import bloom, search, categories, catalog_state, metrics
+from backend.assets import load_manifest
+from backend.page_cache import page_cache
+
+
+def warm_up():
+    """
+    Warm every per-process cache, then close the database connections
+    used for it so no connection is ever shared with a forked child
+    Returns: seconds taken
+    """
+    started = time.perf_counter()
+
+    with app.app_context():
+        search.ensure_search_index()
+        categories.ensure_category_stats()
+        catalog_state.ensure_catalog_state()
+        load_manifest()
+
+        # Compile every template once (and fill the bytecode cache)
+        for name in app.jinja_env.list_templates():
+            app.jinja_env.get_template(name)
+
+    bloom.warm()
+
+    # The landing page pulls the first catalog page and renders it into the page cache.
+    # A streamed page is only cached once its body has been read to the end
+    client = app.test_client()
+    for path in ('/', '/api/categories', '/api/products'):
+        response = client.get(path)
+        response.get_data()
+        response.close()
+
+    if app.config['PAGE_CACHE_ENABLED'] and not page_cache.stats()['size']:
+        app.logger.warning("Warm-up did not cache the home page")
+
+    # Workers forked from this process would otherwise report the warm-up requests
+    metrics.reset()
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+    return time.perf_counter() - started
@@ -0,0 +1,34 @@
+"""
+Static asset build
+Copies static/css, static/js and static/icons into ASSET_BUILD_DIR under
+content-hashed names, precompresses the text assets and writes the
+manifest that asset_url() reads
+Usage: python scripts/build_assets.py [--clean]
+"""
+
+import sys
+import os
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from backend.assets import build_assets, brotli
+
+
+def main():
+    """Parse arguments and run the build"""
+    parser = argparse.ArgumentParser(description="Fingerprint and precompress static assets")
+    parser.add_argument('--clean', action='store_true',
+                        help="Delete earlier builds first (by default old hashed files are kept for clients still on them)")
+    args = parser.parse_args()
+
+    build_dir = app.config['ASSET_BUILD_DIR']
+    manifest = build_assets(app.static_folder, build_dir, clean=args.clean)
+
+    encodings = 'gzip + brotli' if brotli is not None else 'gzip (install brotli for .br files)'
+    print(f"✓ Built {len(manifest)} assets into: {build_dir} [{encodings}]")
+    print("  Restart the app to pick up the new manifest")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Query count check for the wishlist reads
+Saves a few products to a scratch user's wishlist, then fails if reading
+the whole wishlist or any page of it takes more than one SQL statement
+(an N+1 regression). Everything it writes is rolled back afterwards
+Usage: python scripts/check_query_counts.py [--items N]
+"""
+
+import sys
+import os
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from backend import db_utils
+from backend.models import Product
+from backend.query_counter import assert_max_queries
+
+
+MAX_QUERIES = 1
+PAGE_SIZE = 2
+
+
+class _Rollback(Exception):
+    """Raised to discard the scratch data at the end of the check"""
+
+
+def check(label, func):
+    """Run func under assert_max_queries; returns (False, None) if it issued too many, else (True, result)"""
+    try:
+        with assert_max_queries(MAX_QUERIES) as counter:
+            result = func()
+    except AssertionError as error:
+        print(f"✗ {label}")
+        for line in str(error).splitlines():
+            print(f"      {line}")
+        return False, None
+    print(f"✓ {label} ({counter.count} {'query' if counter.count == 1 else 'queries'})")
+    return True, result
+
+
+def run_checks(user_id, items):
+    """Whole wishlist, then every page; returns the number of failures"""
+    failures = 0
+    ok, products = check(f"get_user_wishlist ({items} items)", lambda: db_utils.get_user_wishlist(user_id))
+    failures += not ok
+    if ok and len(products) != items:
+        print(f"✗ get_user_wishlist returned {len(products)} of {items} items")
+        failures += 1
+
+    cursor, page = None, 1
+    while True:
+        ok, result = check(f"get_user_wishlist_page (page {page}, limit={PAGE_SIZE})",
+                           lambda: db_utils.get_user_wishlist_page(user_id, limit=PAGE_SIZE, cursor=cursor))
+        failures += not ok
+        if not ok:
+            break
+        _, cursor = result
+        if cursor is None:
+            break
+        page += 1
+    return failures
+
+
+def main():
+    """Exit with status 1 if a wishlist read issues more than one query"""
+    parser = argparse.ArgumentParser(description="Verify the wishlist reads stay at one query")
+    parser.add_argument('--items', type=int, default=5, help="Wishlist items to save (default: 5)")
+    args = parser.parse_args()
+
+    failures = 0
+    with app.app_context():
+        product_ids = db.session.execute(
+            db.select(Product.id).order_by(Product.id).limit(args.items)
+        ).scalars().all()
+        if not product_ids:
+            print("✗ No products in the database; run scripts/init_db.py first")
+            sys.exit(1)
+
+        try:
+            with db_utils.unit_of_work():
+                user = db_utils.create_user('query-count-check', 'query-count-check@example.com', 'x')
+                db_utils.add_to_wishlist_batch(user['id'], product_ids)
+                failures = run_checks(user['id'], len(product_ids))
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    if failures:
+        print(f"\n✗ {failures} check(s) failed; look for a lazy load or a query per item")
+        sys.exit(1)
+    print(f"\n✓ Every wishlist read takes at most {MAX_QUERIES} query")
+
+
+if __name__ == '__main__':
+    main()
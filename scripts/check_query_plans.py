@@ -0,0 +1,87 @@
+"""
+Query plan check for the product listing
+Prints SQLite's EXPLAIN QUERY PLAN for every filter/sort combination of
+/api/products (with the columns the endpoint really selects), first page
+and a later (keyset) page, plus the facet query, and fails if any of them
+reads the whole products table instead of an index, or sorts its rows in
+a temporary b-tree where an index could give the order (a text filter or
+a price range under another sort has to sort its matches, see
+listing.sort_needs_temp_btree)
+Usage: python scripts/check_query_plans.py [--quiet]
+"""
+
+import sys
+import os
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from backend import listing
+from backend.pagination import encode_cursor
+
+
+# Values only shape the plan, they do not need to match any product
+FILTER_CASES = {
+    'no filter': {},
+    'category': {'category': 'Laptops'},
+    'price range': {'min_price': 100.0, 'max_price': 500.0},
+    'category + price range': {'category': 'Laptops', 'min_price': 100.0, 'max_price': 500.0},
+    'text': {'q': 'apple'},
+    'category + text': {'category': 'Laptops', 'q': 'apple'},
+}
+
+
+# A later page's cursor for each sort
+SAMPLE_CURSORS = {
+    'id': {'after': 5},
+    'price': {'s': 'price', 'v': 100.0, 'id': 5},
+    '-price': {'s': '-price', 'v': 100.0, 'id': 5},
+    'newest': {'s': 'newest', 'v': '2025-01-01T00:00:00', 'id': 5},
+    'popularity': {'s': 'popularity', 'v': 3, 'id': 5},
+}
+
+
+def check_plan(label, query, quiet, rowid_order=False, sort_expected=False):
+    """Print one plan; returns False if it contains a full table scan or an avoidable temp b-tree sort"""
+    plan = listing.explain(query)
+    ok = not listing.is_table_scan(plan, rowid_order)
+    ok = ok and (sort_expected or not listing.uses_temp_sort(plan))
+    print(f"{'✓' if ok else '✗'} {label}")
+    if not ok or not quiet:
+        for step in plan:
+            print(f"      {step}")
+    return ok
+
+
+def main():
+    """Explain every combination and exit with status 1 on a table scan"""
+    parser = argparse.ArgumentParser(description="Verify the product listing query plans")
+    parser.add_argument('--quiet', action='store_true', help="Only print plans that fail")
+    args = parser.parse_args()
+
+    failures = 0
+    with app.app_context():
+        columns = listing.page_columns()
+        for name, values in FILTER_CASES.items():
+            filters = dict.fromkeys(listing.FILTERS)
+            filters.update(values)
+
+            for sort in listing.SORTS:
+                rowid_order = sort == 'id' and not values
+                for page, cursor in (('first page', None), ('next page', encode_cursor(SAMPLE_CURSORS[sort]))):
+                    query = listing.build_query(columns, filters, sort, limit=25, cursor=cursor)
+                    failures += not check_plan(f"{name} | sort={sort} | {page}", query, args.quiet, rowid_order,
+                                               listing.sort_needs_temp_btree(filters, sort))
+
+            if listing.has_filters(filters, include_category=False):
+                failures += not check_plan(f"{name} | facets", listing.facet_query(filters), args.quiet,
+                                           sort_expected=listing.sort_needs_temp_btree(filters))
+
+    if failures:
+        print(f"\n✗ {failures} plan(s) scan the products table or sort in a temp b-tree; add or fix an index")
+        sys.exit(1)
+    print("\n✓ Every listing query is index-backed")
+
+
+if __name__ == '__main__':
+    main()
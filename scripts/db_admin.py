@@ -10,6 +10,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import app, db
 from backend.models import User, Product, WishlistItem
+from backend import search, categories, catalog_state, popularity
 from datetime import datetime
 
 
@@ -28,9 +29,10 @@ def display_menu():
     print("6. Update product price")
     print("7. Delete product")
     print("8. Delete user")
-    print("9. Search products by name")
+    print("9. Search products")
     print("\n[UTILITIES]")
     print("10. Export products to CSV")
+    print("11. Slow query report")
     print("0. Exit")
     print("="*50)
 
@@ -54,11 +56,14 @@ def view_all_products():
 def view_all_users():
     """Display all users"""
     with app.app_context():
-        users = User.query.all()
+        # Wishlist sizes come from one grouped outer join, not a query per user
+        from sqlalchemy import func
+        users = db.session.query(User, func.count(WishlistItem.id)).outerjoin(
+            WishlistItem, WishlistItem.user_id == User.id
+        ).group_by(User.id).order_by(User.id).all()
         print(f"\n=== ALL USERS ({len(users)}) ===\n")
 
-        for u in users:
-            wishlist_count = len(u.wishlist_items)
+        for u, wishlist_count in users:
             print(f"  [{u.id}] {u.username}")
             print(f"      Email: {u.email}")
             print(f"      Wishlist: {wishlist_count} items")
@@ -69,15 +74,23 @@ def view_all_users():
 def view_all_wishlists():
     """Display all wishlist relationships"""
     with app.app_context():
-        users = User.query.all()
+        # Every wishlist row with its user and product in one joined query
+        rows = db.session.query(User.id, User.username, Product.name, Product.price).join(
+            WishlistItem, WishlistItem.user_id == User.id
+        ).join(
+            Product, Product.id == WishlistItem.product_id
+        ).order_by(User.id, WishlistItem.added_at, WishlistItem.id).all()
         print(f"\n=== ALL WISHLISTS ===\n")
 
-        for user in users:
-            if user.wishlist_items:
-                print(f"{user.username}'s Wishlist ({len(user.wishlist_items)} items):")
-                for item in user.wishlist_items:
-                    print(f"  • {item.product.name} - ${item.product.price}")
-                print()
+        wishlists = {}
+        for user_id, username, product_name, price in rows:
+            wishlists.setdefault((user_id, username), []).append((product_name, price))
+
+        for (_, username), items in wishlists.items():
+            print(f"{username}'s Wishlist ({len(items)} items):")
+            for product_name, price in items:
+                print(f"  • {product_name} - ${price}")
+            print()
 
 
 def view_product_by_id():
@@ -101,8 +114,7 @@ def view_product_by_id():
         print(f"External Link: {product.external_link}")
         print(f"Created: {product.created_at.strftime('%Y-%m-%d %H:%M')}")
 
-        wishlist_count = len(product.wishlist_items)
-        print(f"\nWishlisted by: {wishlist_count} users")
+        print(f"\nWishlisted by: {product.wishlist_count} users")
 
 
 def view_statistics():
@@ -117,16 +129,17 @@ def view_statistics():
         print(f"Total Products: {product_count}")
         print(f"Total Wishlist Items: {wishlist_count}")
 
-        # Category breakdown
+        # Category breakdown, from the category summary table
         from sqlalchemy import func
-        categories = db.session.query(
-            Product.category,
-            func.count(Product.id)
-        ).group_by(Product.category).all()
+        stats = categories.list_category_stats()
 
         print(f"\nProducts by Category:")
-        for category, count in categories:
-            print(f"  • {category or 'Uncategorized'}: {count}")
+        for category in stats:
+            print(f"  • {category['name']}: {category['product_count']} "
+                  f"(${category['min_price']:.2f} - ${category['max_price']:.2f})")
+        uncategorized = product_count - sum(c['product_count'] for c in stats)
+        if uncategorized:
+            print(f"  • Uncategorized: {uncategorized}")
 
         # Price statistics
         avg_price = db.session.query(func.avg(Product.price)).scalar()
@@ -152,7 +165,12 @@ def update_product_price():
             return
 
         old_price = product.price
+        categories.ensure_category_stats()
+        catalog_state.ensure_catalog_state()
         product.price = new_price
+        db.session.flush()
+        categories.record_changed((product.category, old_price), (product.category, new_price))
+        catalog_state.record_change()
         db.session.commit()
 
         print(f"✓ Updated {product.name}")
@@ -175,7 +193,15 @@ def delete_product():
 
         if confirm == 'yes':
             name = product.name
+            search.ensure_search_index()
+            categories.ensure_category_stats()
+            catalog_state.ensure_catalog_state()
+            removed = (product.category, product.price)
             db.session.delete(product)
+            db.session.flush()
+            search.unindex_product(product_id)
+            categories.record_removed([removed])
+            catalog_state.record_change()
             db.session.commit()
             print(f"✓ Deleted: {name}")
         else:
@@ -197,6 +223,7 @@ def delete_user():
 
         if confirm == 'yes':
             username = user.username
+            popularity.release_user(user_id)
             db.session.delete(user)
             db.session.commit()
             print(f"✓ Deleted user: {username}")
@@ -205,13 +232,11 @@ def delete_user():
 
 
 def search_products():
-    """Search products by name"""
+    """Search products by name, description or category"""
     query = input("\nSearch for: ")
 
     with app.app_context():
-        results = Product.query.filter(
-            Product.name.like(f'%{query}%')
-        ).all()
+        results, _ = search.search(query, limit=search.MAX_LIMIT)
 
         print(f"\n=== SEARCH RESULTS ({len(results)}) ===\n")
 
@@ -224,30 +249,49 @@ def search_products():
 
 def export_to_csv():
     """Export products to CSV file"""
-    import csv
+    from backend.exporter import export_to_file
 
     filename = f"products_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
 
-    with app.app_context():
-        products = Product.query.all()
+    # Streams through a server-side cursor instead of loading every product
+    written = export_to_file(filename, 'csv')
+
+    print(f"\n✓ Exported products to: {filename} ({written:,} bytes)")
+
+
+def slow_query_report():
+    """Show logged slow statements grouped by shape, slowest in total first"""
+    from backend.slow_queries import read_log, aggregate, clear_log
+
+    path = app.config['SLOW_QUERY_LOG_PATH']
+    groups = aggregate(read_log(path))
+
+    print(f"\n=== SLOW QUERIES (over {app.config['SLOW_QUERY_THRESHOLD_MS']} ms) ===")
+    if not groups:
+        print("\nNo slow queries logged")
+        return
 
-        with open(filename, 'w', newline='') as csvfile:
-            fieldnames = ['id', 'name', 'description', 'price', 'category', 'image_url', 'external_link']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+    for rank, group in enumerate(groups[:10], 1):
+        last = group['last']
+        print(f"\n{rank}. [{group['shape_id']}] {group['count']}x, "
+              f"total {group['total_ms']:.0f} ms, avg {group['avg_ms']:.1f} ms, max {group['max_ms']:.1f} ms")
+        print(f"   {group['shape'][:300]}")
+        if group['full_scans']:
+            print(f"   ⚠ Full table scan of: {', '.join(group['full_scans'])}")
+        print(f"   From: {', '.join(source for source, _ in group['sources'].most_common(3))}")
+        for caller, _ in group['callers'].most_common(3):
+            print(f"   Caller: {caller}")
+        print(f"   Last: {last['time']}, {last['ms']:.1f} ms, params {last['params']}")
+        for step in last['plan']:
+            print(f"   Plan: {step}")
 
-            writer.writeheader()
-            for p in products:
-                writer.writerow({
-                    'id': p.id,
-                    'name': p.name,
-                    'description': p.description,
-                    'price': p.price,
-                    'category': p.category,
-                    'image_url': p.image_url,
-                    'external_link': p.external_link
-                })
+    if len(groups) > 10:
+        print(f"\n... and {len(groups) - 10} more statement shapes")
 
-        print(f"\n✓ Exported {len(products)} products to: {filename}")
+    confirm = input("\nClear the slow-query log? (y/N): ").strip().lower()
+    if confirm == 'y':
+        clear_log(path)
+        print("✓ Slow-query log cleared")
 
 
 def main():
@@ -279,6 +323,8 @@ def main():
             search_products()
         elif choice == '10':
             export_to_csv()
+        elif choice == '11':
+            slow_query_report()
         else:
             print("Invalid choice")
 
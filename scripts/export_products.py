@@ -0,0 +1,41 @@
+"""
+Product export tool
+Streams the whole catalog to CSV or JSONL with constant memory
+Usage: python scripts/export_products.py [--format csv|jsonl] [--gzip] [--output FILE]
+"""
+
+import sys
+import os
+import argparse
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.exporter import export_to_file, FORMATS, DEFAULT_BATCH_SIZE
+
+
+def main():
+    """Parse arguments and run the export"""
+    parser = argparse.ArgumentParser(description="Export the product catalog")
+    parser.add_argument('--format', choices=FORMATS, default='csv', dest='file_format',
+                        help="Output format (default: csv)")
+    parser.add_argument('--gzip', action='store_true', help="Compress the output with gzip")
+    parser.add_argument('--output', '-o',
+                        help="Output file, or '-' for stdout (default: products_export_<timestamp>.<format>)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Rows fetched per round trip (default: {DEFAULT_BATCH_SIZE})")
+    args = parser.parse_args()
+
+    output = args.output
+    if output is None:
+        output = f"products_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{args.file_format}"
+        if args.gzip:
+            output += '.gz'
+
+    written = export_to_file(output, args.file_format, compress=args.gzip, batch_size=args.batch_size)
+
+    if output != '-':
+        print(f"✓ Exported products to: {output} ({written:,} bytes)")
+
+
+if __name__ == '__main__':
+    main()
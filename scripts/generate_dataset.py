@@ -0,0 +1,71 @@
+"""
+Synthetic dataset generator for load and performance testing
+Fills the database with a deterministic catalog, users and Zipf-skewed
+wishlists; the same --seed always builds the same data. Every generated
+user logs in as user0000001... with --password
+Usage: python scripts/generate_dataset.py [--products N] [--users N] [--wishlists N]
+                                          [--seed N] [--skew S] [--reset]
+e.g. the large profile: --products 1000000 --users 100000 --wishlists 5000000 --reset
+"""
+
+import sys
+import os
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, database_path
+from backend.datagen import generate, DEFAULT_SEED, DEFAULT_SKEW, DEFAULT_PASSWORD
+
+
+def reset_database():
+    """Delete the SQLite database (and its WAL files) and create empty tables"""
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(database_path + suffix):
+            os.remove(database_path + suffix)
+    with app.app_context():
+        db.create_all()
+
+
+def main():
+    """Parse arguments and build the dataset"""
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic dataset")
+    parser.add_argument('--products', type=int, default=10000, help="Products to create (default: 10000)")
+    parser.add_argument('--users', type=int, default=1000, help="Users to create (default: 1000)")
+    parser.add_argument('--wishlists', type=int, default=50000,
+                        help="Wishlist rows to aim for across all users (default: 50000)")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help=f"Random seed (default: {DEFAULT_SEED})")
+    parser.add_argument('--skew', type=float, default=DEFAULT_SKEW,
+                        help=f"Zipf exponent of wishlist popularity (default: {DEFAULT_SKEW})")
+    parser.add_argument('--password', default=DEFAULT_PASSWORD,
+                        help=f"Password of every generated user (default: {DEFAULT_PASSWORD})")
+    parser.add_argument('--reset', action='store_true',
+                        help="Delete the existing database first (all data is lost)")
+    parser.add_argument('--quiet', action='store_true', help="Only print the final summary")
+    args = parser.parse_args()
+
+    if args.reset:
+        reset_database()
+    else:
+        with app.app_context():
+            db.create_all()
+
+    stats = generate(
+        args.products, args.users, args.wishlists,
+        seed=args.seed, skew=args.skew, password=args.password,
+        progress=not args.quiet
+    )
+
+    total = sum(stats['seconds'].values())
+    print(f"\n✓ Dataset generated in {total:.1f}s (seed {args.seed})")
+    print(f"  Products: {stats['products']:,}")
+    print(f"  Users: {stats['users']:,}")
+    print(f"  Wishlist items: {stats['wishlists']:,}")
+    for step, seconds in stats['seconds'].items():
+        print(f"  {step}: {seconds:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
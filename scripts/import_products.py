@@ -0,0 +1,45 @@
+"""
+Product import tool for vendor feeds
+Streams a CSV or JSONL file into the products table in chunks
+Usage: python scripts/import_products.py feed.csv [--format csv|jsonl] [--chunk-size 5000]
+"""
+
+import sys
+import os
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.importer import import_file, READERS, DEFAULT_CHUNK_SIZE, MAX_REPORTED_LINES
+
+
+def main():
+    """Parse arguments and run the import"""
+    parser = argparse.ArgumentParser(description="Import products from a CSV or JSONL feed")
+    parser.add_argument('path', help="Feed file, or '-' to read from stdin")
+    parser.add_argument('--format', choices=sorted(READERS), dest='file_format',
+                        help="Input format (default: from the file extension)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Rows per transaction (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument('--quiet', action='store_true', help="Only print the final summary")
+    args = parser.parse_args()
+
+    stats = import_file(
+        args.path,
+        file_format=args.file_format,
+        chunk_size=args.chunk_size,
+        progress=not args.quiet
+    )
+
+    rate = stats['read'] / stats['seconds'] if stats['seconds'] else 0
+    print(f"\n✓ Import finished in {stats['seconds']:.1f}s ({rate:,.0f} rows/s)")
+    print(f"  Read: {stats['read']:,}")
+    print(f"  Inserted: {stats['inserted']:,}")
+    print(f"  Skipped (already exist): {stats['skipped']:,}")
+    print(f"  Invalid: {stats['invalid']:,}")
+    if stats['malformed_lines']:
+        more = ', ...' if len(stats['malformed_lines']) == MAX_REPORTED_LINES else ''
+        print(f"  Malformed JSON on line(s): {', '.join(map(str, stats['malformed_lines']))}{more}")
+
+
+if __name__ == '__main__':
+    main()
@@ -8,8 +8,15 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+
 from app import app, db
 from backend.models import User, Product, WishlistItem
+from backend.search import ensure_search_index
+from backend.categories import rebuild_category_stats
+from backend.catalog_state import ensure_catalog_state, record_change
+from backend.popularity import reconcile as reconcile_wishlist_counts
 
 
 def init_database():
@@ -17,11 +24,56 @@ def init_database():
     with app.app_context():
         # Create all tables
         db.create_all()
+        added_columns = add_missing_columns()
+        create_missing_indexes()
         print("Database tables created successfully!")
 
+        # A freshly added wishlist_count starts at 0 for every product
+        if 'products.wishlist_count' in added_columns:
+            print(f"Counted existing wishlists for {reconcile_wishlist_counts()} products")
+
         # Optionally add some sample products
         add_sample_products()
 
+        # Build the full-text search index over the catalog
+        ensure_search_index()
+
+        # Per-category counts and price ranges for /api/categories
+        rebuild_category_stats()
+
+        # Shared revision behind the catalog ETag/Last-Modified
+        ensure_catalog_state()
+
+
+def add_missing_columns():
+    """
+    Add columns declared on the models that an older database lacks
+    (create_all never alters an existing table); such columns need a
+    server_default so existing rows get a value
+    Returns: list of 'table.column' names that were added
+    """
+    inspector = inspect(db.engine)
+    added = []
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                ddl = CreateColumn(column).compile(dialect=db.engine.dialect)
+                db.session.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                added.append(f"{table.name}.{column.name}")
+    db.session.commit()
+    return added
+
+
+def create_missing_indexes():
+    """
+    Create indexes declared on the models that an older database lacks
+    (create_all only creates indexes together with a new table)
+    """
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
 
 def add_sample_products():
     """Add sample products from the homepage to the database"""
@@ -98,10 +150,12 @@ def add_sample_products():
         }
     ]
 
+    ensure_catalog_state()
     for product_data in sample_products:
         product = Product(**product_data)
         db.session.add(product)
 
+    record_change()
     db.session.commit()
     print(f"Added {len(sample_products)} sample products to the database!")
 
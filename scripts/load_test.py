@@ -0,0 +1,117 @@
+"""
+HTTP load test and latency benchmark
+Boots the production server (scripts/serve.py) against a generated
+dataset, drives it with a workload and reports requests/sec and
+p50/p95/p99 per route. Results are written as JSON (tagged with the git
+commit) so runs can be compared across commits with --compare
+Usage: python scripts/load_test.py [--workload browse|login|wishlist|mixed]
+                                   [--dataset small|medium|large] [--concurrency N]
+                                   [--duration S] [--url http://host:port] [--compare FILE]
+"""
+
+import sys
+import os
+import json
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.loadtest import (
+    run, ensure_dataset, local_server, save_results, compare, git_commit, timestamp,
+    WORKLOADS, DATASETS, DEFAULT_PASSWORD, RESULTS_DIR
+)
+
+
+def print_results(results):
+    """Per-route table of a run"""
+    print(f"\n{'Route':<28} {'Requests':>9} {'RPS':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Errors':>7}")
+    print("-" * 82)
+    rows = list(results['routes'].items()) + [('TOTAL', results['total'])]
+    for route, stats in rows:
+        print(f"{route:<28} {stats['requests']:>9,} {stats['rps']:>8.1f} "
+              f"{_ms(stats['p50_ms']):>8} {_ms(stats['p95_ms']):>8} {_ms(stats['p99_ms']):>8} {stats['errors']:>7,}")
+
+
+def print_comparison(baseline, results):
+    """Per-route rps and p95 against a baseline run"""
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'} ({baseline['meta']['started']}):")
+    print(f"{'Route':<28} {'RPS before':>11} {'RPS now':>9} {'p95 before':>11} {'p95 now':>9} {'p95 Δ':>8}")
+    print("-" * 80)
+    for route, rps_before, rps_now, p95_before, p95_now, change in compare(baseline, results):
+        delta = f"{change:+.1f}%" if change is not None else '-'
+        print(f"{route:<28} {_num(rps_before):>11} {_num(rps_now):>9} "
+              f"{_ms(p95_before):>11} {_ms(p95_now):>9} {delta:>8}")
+
+
+def _ms(value):
+    return f"{value:.1f}" if value is not None else '-'
+
+
+def _num(value):
+    return f"{value:,.1f}" if value is not None else '-'
+
+
+def main():
+    """Parse arguments, run the load test and save the results"""
+    parser = argparse.ArgumentParser(description="Load test the app and report per-route latency")
+    parser.add_argument('--workload', choices=sorted(WORKLOADS), default='mixed',
+                        help="Traffic mix (default: mixed)")
+    parser.add_argument('--dataset', choices=list(DATASETS), default='small',
+                        help="Generated dataset to serve, built on first use (default: small)")
+    parser.add_argument('--seed', type=int, default=42, help="Dataset and traffic seed (default: 42)")
+    parser.add_argument('--concurrency', '-c', type=int, default=16,
+                        help="Virtual users sending requests in parallel (default: 16)")
+    parser.add_argument('--duration', '-d', type=float, default=30,
+                        help="Measured seconds (default: 30)")
+    parser.add_argument('--warmup', type=float, default=5,
+                        help="Unmeasured seconds before measuring (default: 5)")
+    parser.add_argument('--workers', type=int, help="Server worker processes (default: serve.py's)")
+    parser.add_argument('--threads', type=int, help="Threads per server worker (default: serve.py's)")
+    parser.add_argument('--url', help="Test an already running server instead of booting one "
+                                      "(it must serve the --dataset data)")
+    parser.add_argument('--output', '-o', help=f"Results file (default: a new file in {RESULTS_DIR})")
+    parser.add_argument('--compare', metavar='FILE', help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    products, users, wishlists = DATASETS[args.dataset]
+    meta = {
+        'commit': git_commit(),
+        'started': timestamp(),
+        'workload': args.workload,
+        'dataset': args.dataset,
+        'seed': args.seed,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'warmup': args.warmup,
+        'url': args.url,
+        'workers': args.workers,
+        'threads': args.threads,
+    }
+
+    options = dict(
+        workload=args.workload, concurrency=args.concurrency, duration=args.duration,
+        warmup=args.warmup, products=products, users=users, password=DEFAULT_PASSWORD, seed=args.seed
+    )
+
+    if args.url:
+        results = run(args.url, **options)
+    else:
+        database = ensure_dataset(args.dataset, seed=args.seed)
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        log_path = os.path.join(RESULTS_DIR, 'server.log')
+        with local_server(database, workers=args.workers, threads=args.threads, log_path=log_path) as base_url:
+            print(f"→ {args.workload} workload, {args.concurrency} virtual users, "
+                  f"{args.duration:g}s against {base_url} ({args.dataset} dataset)")
+            results = run(base_url, **options)
+
+    results = {'meta': meta, **results}
+    print_results(results)
+    path = save_results(results, args.output)
+    print(f"\n✓ Results written to {path}")
+
+    if args.compare:
+        with open(args.compare) as handle:
+            print_comparison(json.load(handle), results)
+
+
+if __name__ == '__main__':
+    main()
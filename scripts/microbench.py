@@ -0,0 +1,168 @@
+"""
+Microbenchmarks for db_utils and product serialization
+Times the hot functions at several dataset sizes and compares the result
+with the committed baseline (benchmarks/baseline.json), failing when a
+benchmark got slower than --threshold percent. Baselines are only
+comparable on the machine they were recorded on: re-record with
+--save-baseline after a hardware change or an intended slowdown
+Usage: python scripts/microbench.py run [--datasets small,medium] [--only NAMES]
+                                        [--output FILE] [--save-baseline]
+       python scripts/microbench.py compare [RESULTS] [--baseline FILE] [--threshold PCT]
+       python scripts/microbench.py list
+"""
+
+import sys
+import os
+import json
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.microbench import (
+    run, run_in_worker, compare, recheck, speed_factor,
+    BENCHMARKS, BASELINE_PATH, DEFAULT_DATASETS, DEFAULT_THRESHOLD
+)
+from backend.loadtest import RESULTS_DIR
+
+
+def _names(value):
+    return [name.strip() for name in value.split(',') if name.strip()] if value else None
+
+
+def print_results(results):
+    """Best and median time per call of every benchmark"""
+    for dataset, benchmarks in results['results'].items():
+        print(f"\n{dataset}:")
+        print(f"  {'Benchmark':<28} {'Best':>12} {'Median':>12} {'Loops':>7}")
+        for name, stats in benchmarks.items():
+            print(f"  {name:<28} {_duration(stats['min_us']):>12} {_duration(stats['median_us']):>12} {stats['loops']:>7,}")
+
+
+def print_comparison(rows, threshold):
+    """Table of compare() rows; returns the number of regressions"""
+    print(f"\n{'Dataset':<8} {'Benchmark':<28} {'Baseline':>12} {'Now':>12} {'Change':>9}")
+    print("-" * 74)
+    marks = {'regression': '  ✗ slower', 'faster': '  ✓ faster', 'new': '  (new)', 'ok': ''}
+    for dataset, name, before, after, change, verdict in rows:
+        delta = f"{change:+.1f}%" if change is not None else '-'
+        before = _duration(before) if before is not None else '-'
+        print(f"{dataset:<8} {name:<28} {before:>12} {_duration(after):>12} {delta:>9}{marks[verdict]}")
+
+    regressions = sum(1 for row in rows if row[5] == 'regression')
+    if regressions:
+        print(f"\n✗ {regressions} benchmark(s) more than {threshold:g}% slower than the baseline")
+    else:
+        print(f"\n✓ No benchmark more than {threshold:g}% slower than the baseline")
+    return regressions
+
+
+def _duration(microseconds):
+    if microseconds >= 1e6:
+        return f"{microseconds / 1e6:.2f} s"
+    if microseconds >= 1e3:
+        return f"{microseconds / 1e3:.2f} ms"
+    return f"{microseconds:.1f} µs"
+
+
+def _load(path):
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def _write(results, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as handle:
+        json.dump(results, handle, indent=2)
+        handle.write('\n')
+
+
+def main():
+    """Parse arguments and run the chosen command"""
+    parser = argparse.ArgumentParser(description="Microbenchmarks for db_utils and serialization")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Run the benchmarks and compare with the baseline")
+    run_parser.add_argument('--datasets', default=','.join(DEFAULT_DATASETS),
+                            help=f"Comma-separated dataset sizes (default: {','.join(DEFAULT_DATASETS)})")
+    run_parser.add_argument('--only', help="Comma-separated benchmark names (default: all)")
+    run_parser.add_argument('--seed', type=int, default=42, help="Dataset and fixture seed (default: 42)")
+    run_parser.add_argument('--output', '-o', help="Results file (default: a new file in instance/benchmarks)")
+    run_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                            help=f"Percent slowdown counted as a regression (default: {DEFAULT_THRESHOLD})")
+    run_parser.add_argument('--save-baseline', action='store_true',
+                            help=f"Store the results as the new baseline ({os.path.relpath(BASELINE_PATH)})")
+
+    compare_parser = commands.add_parser('compare', help="Compare a results file with the baseline")
+    compare_parser.add_argument('results', nargs='?', help="Results file (default: the newest run)")
+    compare_parser.add_argument('--baseline', default=BASELINE_PATH, help="Baseline file")
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help=f"Percent slowdown counted as a regression (default: {DEFAULT_THRESHOLD})")
+
+    commands.add_parser('list', help="List the benchmarks")
+
+    # Internal: runs inside the scratch-database process started by run
+    worker_parser = commands.add_parser('worker')
+    worker_parser.add_argument('--output', required=True)
+    worker_parser.add_argument('--only')
+    worker_parser.add_argument('--seed', type=int, default=42)
+
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for name, (description, _) in BENCHMARKS.items():
+            print(f"{name:<28} {description}")
+        return
+
+    if args.command == 'worker':
+        _write(run_in_worker(_names(args.only) or list(BENCHMARKS), seed=args.seed), args.output)
+        return
+
+    if args.command == 'run':
+        results = run(_names(args.datasets), names=_names(args.only), seed=args.seed)
+        path = args.output or os.path.join(
+            RESULTS_DIR, f"micro-{results['meta']['commit'] or 'nogit'}-{results['meta']['started']}.json"
+        )
+
+        if args.save_baseline or not os.path.exists(BASELINE_PATH):
+            print_results(results)
+            _write(results, path)
+            print(f"\n✓ Results written to {path}")
+            if args.save_baseline:
+                _write(results, BASELINE_PATH)
+                print(f"✓ Baseline updated: {BASELINE_PATH}")
+            else:
+                print("No baseline yet; record one with --save-baseline")
+            return
+
+        baseline = _load(BASELINE_PATH)
+        rows = compare(baseline, results, args.threshold)
+        if any(row[5] == 'regression' for row in rows):
+            print("→ Re-checking the benchmarks that look slower...")
+            recheck(results, rows, seed=args.seed)
+            rows = compare(baseline, results, args.threshold)
+
+        print_results(results)
+        _write(results, path)
+        print(f"\n✓ Results written to {path}")
+
+    else:
+        path = args.results
+        if path is None:
+            runs = sorted(
+                (os.path.join(RESULTS_DIR, name) for name in os.listdir(RESULTS_DIR) if name.startswith('micro-'))
+                if os.path.isdir(RESULTS_DIR) else (),
+                key=os.path.getmtime
+            )
+            if not runs:
+                sys.exit("No results to compare; run: python scripts/microbench.py run")
+            path = runs[-1]
+        results = _load(path)
+        baseline = _load(args.baseline)
+        rows = compare(baseline, results, args.threshold)
+
+    print(f"\nBaseline: {baseline['meta'].get('commit') or '?'} ({baseline['meta']['started']}), "
+          f"machine speed factor {speed_factor(baseline, results):.2f} (changes are scaled by it)")
+    if print_comparison(rows, args.threshold):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Wishlist counter repair
+Compares every product's wishlist_count with its rows in wishlist_items
+and resets the ones that drifted (e.g. after wishlist rows were changed
+with raw SQL)
+Usage: python scripts/reconcile_wishlist_counts.py [--dry-run]
+"""
+
+import sys
+import os
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from backend import popularity
+
+
+def main():
+    """Parse arguments, report drift and fix it"""
+    parser = argparse.ArgumentParser(description="Repair products.wishlist_count")
+    parser.add_argument('--dry-run', action='store_true', help="Only list drifted products")
+    args = parser.parse_args()
+
+    with app.app_context():
+        drift = popularity.find_drift()
+        if not drift:
+            print("✓ Every wishlist count is correct")
+            return
+
+        print(f"{len(drift)} product(s) with a wrong wishlist count:")
+        for product_id, name, stored, actual in drift:
+            print(f"  ID {product_id}: {name} | stored {stored}, actual {actual}")
+
+        if args.dry_run:
+            print("\nDry run, nothing changed")
+            return
+
+        fixed = popularity.reconcile()
+        print(f"\n✓ Fixed {fixed} product(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Production server
+Runs the app under gunicorn with a pre-forked pool of threaded workers.
+The app is imported and its caches warmed once in the master, then
+workers are forked from it and share those pages copy-on-write; a worker
+is recycled after --max-requests requests, again forked warm from the
+master
+Usage: python scripts/serve.py [--bind 127.0.0.1:8000] [--workers N] [--threads N]
+                               [--max-requests N] [--pid FILE]
+
+Signals to the master process (see --pid):
+  HUP          replace every worker gracefully (in-flight requests finish)
+  USR2, then   start a new master running the current code next to the
+  TERM old     old one, then stop the old one: a zero-downtime code reload
+  TERM         graceful shutdown
+"""
+
+import sys
+import os
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gunicorn.app.base import BaseApplication
+
+
+CPU_COUNT = os.cpu_count() or 1
+
+# SQLite has a single writer, so a few threads per worker is plenty
+DEFAULT_WORKERS = CPU_COUNT
+DEFAULT_THREADS = 4
+DEFAULT_MAX_REQUESTS = 10000
+
+
+class PreloadedServer(BaseApplication):
+    """gunicorn application that preloads and warms the Flask app in the master"""
+
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        # Runs once in the master because preload_app is on
+        from app import app
+        from backend.warmup import warm_up
+
+        # Share the CPUs between the workers' password hashing pools (0 = inline stays inline)
+        if app.config['PASSWORD_HASH_WORKERS']:
+            per_worker = max(1, CPU_COUNT // self.cfg.workers)
+            app.config['PASSWORD_HASH_WORKERS'] = min(app.config['PASSWORD_HASH_WORKERS'], per_worker)
+
+        seconds = warm_up()
+        print(f"✓ App preloaded and warmed in {seconds:.2f}s")
+        return app
+
+
+def main():
+    """Parse arguments and run the server until it is stopped"""
+    parser = argparse.ArgumentParser(description="Run the app with pre-forked workers")
+    parser.add_argument('--bind', '-b', default=os.environ.get('BIND', '127.0.0.1:8000'),
+                        help="Address to listen on (default: 127.0.0.1:8000, or $BIND)")
+    parser.add_argument('--workers', '-w', type=int, default=DEFAULT_WORKERS,
+                        help=f"Worker processes (default: CPU count, {DEFAULT_WORKERS})")
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS,
+                        help=f"Threads per worker (default: {DEFAULT_THREADS})")
+    parser.add_argument('--max-requests', type=int, default=DEFAULT_MAX_REQUESTS,
+                        help=f"Recycle a worker after this many requests, 0 = never (default: {DEFAULT_MAX_REQUESTS})")
+    parser.add_argument('--timeout', type=int, default=60,
+                        help="Seconds a worker may stay silent before it is restarted (default: 60)")
+    parser.add_argument('--graceful-timeout', type=int, default=30,
+                        help="Seconds in-flight requests get to finish on reload/shutdown (default: 30)")
+    parser.add_argument('--pid', help="Write the master's pid to this file, for sending signals")
+    args = parser.parse_args()
+
+    options = {
+        'bind': args.bind,
+        'workers': max(1, args.workers),
+        'worker_class': 'gthread',
+        'threads': max(1, args.threads),
+        'preload_app': True,
+        'max_requests': args.max_requests,
+        # Spread recycling out so workers do not all restart at once
+        'max_requests_jitter': args.max_requests // 10,
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'pidfile': args.pid,
+        'accesslog': '-',
+    }
+    PreloadedServer(options).run()
+
+
+if __name__ == '__main__':
+    main()
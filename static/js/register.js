@@ -30,4 +30,44 @@ document.getElementById('registerForm').addEventListener('submit', async (e) =>
     } else {
         alert('Registration failed: ' + data.error);
     }
-});
\ No newline at end of file
+});
+
+// Live "already taken" check while typing; most free names are answered
+// from the server's in-memory filter without touching the database
+function watchAvailability(field) {
+    const input = document.getElementById(field);
+    const hint = document.getElementById(field + '-hint');
+    let timer = null;
+
+    input.addEventListener('input', () => {
+        clearTimeout(timer);
+        hint.textContent = '';
+        hint.className = 'availability-hint';
+
+        const value = input.value.trim();
+        if (!value) return;
+
+        timer = setTimeout(async () => {
+            try {
+                const response = await fetch(`/api/users/available?${field}=${encodeURIComponent(value)}`);
+                const data = await response.json();
+
+                // Ignore answers for a value the user has already changed
+                if (!data.success || input.value.trim() !== value) return;
+
+                if (data[field].available) {
+                    hint.textContent = `${field === 'username' ? 'Username' : 'Email'} is available`;
+                    hint.classList.add('available');
+                } else {
+                    hint.textContent = `${field === 'username' ? 'Username' : 'Email'} is already taken`;
+                    hint.classList.add('taken');
+                }
+            } catch (error) {
+                console.error('Error checking availability:', error);
+            }
+        }, 300);
+    });
+}
+
+watchAvailability('username');
+watchAvailability('email');
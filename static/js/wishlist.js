@@ -1,9 +1,25 @@
 // Wishlist page functionality
 
 document.addEventListener('DOMContentLoaded', function() {
-    loadWishlist();
+    const container = document.querySelector('.wishlist-products-container[data-server-rendered]');
+    if (container) {
+        bindRenderedRows(container);
+    } else {
+        loadWishlist();
+    }
 });
 
+function bindRenderedRows(container) {
+    // Rows streamed by the server only need their remove buttons wired up
+    container.querySelectorAll('.wishlist-row').forEach(row => {
+        const removeBtn = row.querySelector('.remove-btn');
+        const productId = parseInt(removeBtn.dataset.productId, 10);
+        removeBtn.addEventListener('click', async function() {
+            await removeFromWishlist(productId, row);
+        });
+    });
+}
+
 async function loadWishlist() {
     try {
         const response = await fetch('/api/wishlist');
@@ -91,9 +107,10 @@ function createProductRow(product) {
             <span class="price-label">$${product.price.toFixed(2)}</span>
         </div>
         <div class="wishlist-item-actions">
+            ${product.external_link ? `
             <a href="${product.external_link}" target="_blank" class="view-product-btn" title="View Product">
                 <i class="fa-solid fa-external-link"></i>
-            </a>
+            </a>` : ''}
             <button class="remove-btn" data-product-id="${product.id}" title="Remove from wishlist">
                 <i class="fa-solid fa-trash"></i>
             </button>
@@ -127,9 +144,9 @@ async function removeFromWishlist(productId, cardElement) {
             setTimeout(() => {
                 cardElement.remove();
 
-                // Check if wishlist is now empty
-                const cardsWrapper = document.querySelector('.cards-wrapper');
-                if (cardsWrapper && cardsWrapper.children.length === 0) {
+                // Check if wishlist is now empty (server-rendered or built here)
+                const container = document.querySelector('.wishlist-products-container');
+                if (container && container.querySelectorAll('.wishlist-row').length === 0) {
                     displayWishlistProducts([]);
                 }
             }, 300);